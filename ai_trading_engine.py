@@ -1,6 +1,7 @@
 import asyncio
-import json
-from datetime import datetime, timedelta, date
+import math
+from ws_json import ws_text
+from datetime import datetime, timedelta, date, timezone
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
@@ -10,6 +11,7 @@ from models import AITradingConfig, AITradingLog, AITradingPerformance, Trade
 from ai_trading_strategies import create_strategy
 from position_service import PositionService
 from trade_service import save_trade
+from database import transaction
 from multi_exchange_data_feed import multi_exchange_feed
 from real_trading_service import RealTradingService
 from trading_config import TradingManager, TradingMode
@@ -18,6 +20,18 @@ from trading_config import TradingManager, TradingMode
 class AITradingEngine:
     """AI 트레이딩 엔진"""
     
+    # AI 관련 테이블 쓰기마다 증가하는 데이터 버전 (상태/대시보드 캐시 무효화용)
+    data_version = 0
+    
+    # 로그는 버퍼에 모아 일괄 INSERT (주기 또는 버퍼 크기 초과 시)
+    LOG_FLUSH_INTERVAL = 0.25
+    LOG_FLUSH_MAX = 500
+    
+    @classmethod
+    def mark_dirty(cls):
+        """AI 데이터 변경 표시 (data_version 증가)"""
+        cls.data_version += 1
+    
     def __init__(self, db: Session, real_trading_service: RealTradingService):
         self.db = db
         self.real_trading_service = real_trading_service
@@ -25,48 +39,77 @@ class AITradingEngine:
         self.active_strategies: Dict[int, Dict] = {}  # config_id -> strategy info
         self.running = False
         self.websocket_clients = []  # WebSocket 클라이언트 목록
+        self.status_queues: Dict[object, asyncio.Queue] = {}  # WebSocket -> 상태 변경 알림 큐
+        self._log_buf: List[Dict] = []  # 아직 저장되지 않은 AITradingLog 행
         
     async def start_engine(self):
         """AI 트레이딩 엔진 시작"""
         self.running = True
         print("AI Trading Engine started")
+        self.notify_status_change()
         
         # 활성화된 전략들 로드
         await self._load_active_strategies()
         print(f"Loaded {len(self.active_strategies)} active strategies")
         
         # 메인 루프 시작
+        log_flusher = asyncio.create_task(self._flush_logs_periodically())
         loop_count = 0
-        while self.running:
-            try:
-                loop_count += 1
-                if loop_count % 10 == 0:  # 10초마다 상태 출력
-                    print(f"AI Engine running... Active strategies: {len(self.active_strategies)}")
-                
-                await self._process_strategies()
-                await self.check_exit_conditions()  # 청산 조건 체크
-                await asyncio.sleep(1)  # 1초마다 체크
-            except Exception as e:
-                print(f"Error in AI trading engine: {e}")
-                await asyncio.sleep(5)
+        try:
+            while self.running:
+                try:
+                    loop_count += 1
+                    if loop_count % 10 == 0:  # 10초마다 상태 출력
+                        print(f"AI Engine running... Active strategies: {len(self.active_strategies)}")
+                    
+                    await self._process_strategies()
+                    await self.check_exit_conditions()  # 청산 조건 체크
+                    if self.active_strategies:
+                        self.notify_status_change()
+                    await asyncio.sleep(1)  # 1초마다 체크
+                except Exception as e:
+                    print(f"Error in AI trading engine: {e}")
+                    await asyncio.sleep(5)
+        finally:
+            log_flusher.cancel()
+            self._flush_logs()
     
     async def stop_engine(self):
         """AI 트레이딩 엔진 중지"""
         self.running = False
+        self._flush_logs()
         print("AI Trading Engine stopped")
+        self.notify_status_change()
     
-    def add_websocket_client(self, websocket):
-        """WebSocket 클라이언트 추가"""
+    def add_websocket_client(self, websocket) -> asyncio.Queue:
+        """WebSocket 클라이언트 추가 (알림 큐 반환: None 은 상태 변경, str 은 활동 프레임. 최초 1회 상태 알림 포함)"""
         self.websocket_clients.append(websocket)
+        queue = asyncio.Queue(maxsize=16)
+        queue.put_nowait(None)
+        self.status_queues[websocket] = queue
+        return queue
     
     def remove_websocket_client(self, websocket):
         """WebSocket 클라이언트 제거"""
         if websocket in self.websocket_clients:
             self.websocket_clients.remove(websocket)
+        self.status_queues.pop(websocket, None)
+    
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item):
+        """큐에 넣기 (가득 차면 가장 오래된 항목을 버림 - 느린 클라이언트가 엔진을 막지 않도록)"""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+    
+    def notify_status_change(self):
+        """상태 변경을 각 클라이언트 큐에 알림 (None = 상태 스냅샷 요청)"""
+        for queue in self.status_queues.values():
+            self._offer(queue, None)
     
     async def broadcast_activity(self, activity_type: str, message: str, data: dict = None):
-        """실시간 활동을 모든 WebSocket 클라이언트에게 브로드캐스트"""
-        if not self.websocket_clients:
+        """실시간 활동을 모든 WebSocket 클라이언트 큐에 전달 (전송은 각 연결의 루프가 담당)"""
+        if not self.status_queues:
             return
             
         activity = {
@@ -79,18 +122,10 @@ class AITradingEngine:
             }
         }
         
-        # 연결이 끊어진 클라이언트 제거
-        disconnected_clients = []
-        for client in self.websocket_clients:
-            try:
-                await client.send_json(activity)
-            except Exception as e:
-                print(f"Error sending activity to WebSocket client: {e}")
-                disconnected_clients.append(client)
-        
-        # 연결이 끊어진 클라이언트 제거
-        for client in disconnected_clients:
-            self.remove_websocket_client(client)
+        # 한 번만 직렬화해 모든 클라이언트에 동일한 텍스트 프레임 전달
+        message = ws_text(activity)
+        for queue in list(self.status_queues.values()):
+            self._offer(queue, message)
     
     async def _load_active_strategies(self):
         """활성화된 전략들 로드"""
@@ -251,24 +286,23 @@ class AITradingEngine:
                 # 시뮬레이션 거래
                 pnl = 0.0  # 포지션 오픈 시에는 PnL 0
                 
-                # 포지션 업데이트
-                self.position_service.create_or_update_position(
-                    symbol=config.symbol,
-                    side=side,
-                    qty=leveraged_quantity,
-                    entry_price=price,
-                    latest_price=price
-                )
-                
-                # 거래 기록 저장
-                trade = save_trade(
-                    self.db,
-                    config.symbol,
-                    side,
-                    price,
-                    leveraged_quantity,
-                    pnl=pnl
-                )
+                # 포지션 업데이트 + 거래 기록 저장 (단일 트랜잭션)
+                with transaction(self.db):
+                    self.position_service.create_or_update_position(
+                        symbol=config.symbol,
+                        side=side,
+                        qty=leveraged_quantity,
+                        entry_price=price,
+                        latest_price=price
+                    )
+                    trade = save_trade(
+                        self.db,
+                        config.symbol,
+                        side,
+                        price,
+                        leveraged_quantity,
+                        pnl=pnl
+                    )
                 
                 # AI 거래 로그 기록
                 await self._log_trade(
@@ -312,13 +346,14 @@ class AITradingEngine:
                 
                 if order_result.get('status') == 'filled':
                     # 포지션 업데이트
-                    self.position_service.create_or_update_position(
-                        symbol=config.symbol,
-                        side=side,
-                        qty=leveraged_quantity,
-                        entry_price=price,
-                        latest_price=price
-                    )
+                    with transaction(self.db):
+                        self.position_service.create_or_update_position(
+                            symbol=config.symbol,
+                            side=side,
+                            qty=leveraged_quantity,
+                            entry_price=price,
+                            latest_price=price
+                        )
                     
                     # AI 거래 로그 기록
                     await self._log_trade(
@@ -340,40 +375,69 @@ class AITradingEngine:
         except Exception as e:
             print(f"Error opening position for {config.name}: {e}")
     
+    @staticmethod
+    def _indicators_json(analysis: Dict) -> Dict:
+        """JSON 컬럼 저장용 지표 (NaN/inf는 JSONB가 거부하므로 None 처리)"""
+        return {
+            k: (None if isinstance(v, float) and not math.isfinite(v) else v)
+            for k, v in (analysis.get('technical_indicators') or {}).items()
+        }
+    
     async def _log_analysis(self, config_id: int, symbol: str, analysis: Dict):
         """분석 로그 기록"""
-        log = AITradingLog(
-            config_id=config_id,
-            action='ANALYSIS',
-            symbol=symbol,
-            confidence_score=analysis.get('confidence'),
-            technical_indicators=json.dumps(analysis.get('technical_indicators', {})),
-            market_sentiment=analysis.get('signal'),
-            risk_assessment=analysis.get('reason'),
-            reason=analysis.get('reason')
-        )
-        self.db.add(log)
-        self.db.commit()
+        self._buffer_log({
+            'config_id': config_id,
+            'action': 'ANALYSIS',
+            'symbol': symbol,
+            'confidence_score': analysis.get('confidence'),
+            'technical_indicators': self._indicators_json(analysis),
+            'market_sentiment': analysis.get('signal'),
+            'risk_assessment': analysis.get('reason'),
+            'reason': analysis.get('reason')
+        })
     
     async def _log_trade(self, config_id: int, action: str, symbol: str, side: str, 
                         quantity: float, price: float, pnl: float, analysis: Dict):
         """거래 로그 기록"""
-        log = AITradingLog(
-            config_id=config_id,
-            action=action,
-            symbol=symbol,
-            side=side,
-            quantity=quantity,
-            price=price,
-            pnl=pnl,
-            confidence_score=analysis.get('confidence'),
-            technical_indicators=json.dumps(analysis.get('technical_indicators', {})),
-            market_sentiment=analysis.get('signal'),
-            risk_assessment=analysis.get('reason'),
-            reason=analysis.get('reason')
-        )
-        self.db.add(log)
-        self.db.commit()
+        self._buffer_log({
+            'config_id': config_id,
+            'action': action,
+            'symbol': symbol,
+            'side': side,
+            'quantity': quantity,
+            'price': price,
+            'pnl': pnl,
+            'confidence_score': analysis.get('confidence'),
+            'technical_indicators': self._indicators_json(analysis),
+            'market_sentiment': analysis.get('signal'),
+            'risk_assessment': analysis.get('reason'),
+            'reason': analysis.get('reason')
+        })
+    
+    def _buffer_log(self, row: Dict):
+        """로그 행을 버퍼에 추가 (LOG_FLUSH_MAX 초과 시 즉시 저장)"""
+        self._log_buf.append(row)
+        if len(self._log_buf) >= self.LOG_FLUSH_MAX:
+            self._flush_logs()
+    
+    def _flush_logs(self):
+        """버퍼의 로그를 한 번의 일괄 INSERT로 저장"""
+        if not self._log_buf:
+            return
+        rows, self._log_buf = self._log_buf, []
+        try:
+            self.db.bulk_insert_mappings(AITradingLog, rows)
+            self.db.commit()
+            AITradingEngine.mark_dirty()
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error flushing {len(rows)} AI trading logs: {e}")
+    
+    async def _flush_logs_periodically(self):
+        """LOG_FLUSH_INTERVAL마다 로그 버퍼 저장"""
+        while True:
+            await asyncio.sleep(self.LOG_FLUSH_INTERVAL)
+            self._flush_logs()
     
     async def check_exit_conditions(self):
         """청산 조건 체크"""
@@ -404,25 +468,28 @@ class AITradingEngine:
         """포지션 청산"""
         config = strategy_info['config']
         
+        # 청산 전 값 보관 (close_position이 같은 객체를 0으로 초기화함)
+        side = position.side
+        qty = position.qty
+        
         # PnL 계산
-        if position.side == 'BUY':
-            pnl = (current_price - position.entry_price) * position.qty
+        if side == 'BUY':
+            pnl = (current_price - position.entry_price) * qty
         else:  # SELL
-            pnl = (position.entry_price - current_price) * position.qty
-        
-        # 포지션 청산
-        self.position_service.close_position(config.symbol, position.qty)
-        
-        # 거래 기록 저장
-        close_side = 'SELL' if position.side == 'BUY' else 'BUY'
-        trade = save_trade(
-            self.db,
-            config.symbol,
-            close_side,
-            current_price,
-            position.qty,
-            pnl=pnl
-        )
+            pnl = (position.entry_price - current_price) * qty
+        
+        # 포지션 청산 + 거래 기록 저장 (단일 트랜잭션)
+        close_side = 'SELL' if side == 'BUY' else 'BUY'
+        with transaction(self.db):
+            self.position_service.close_position(config.symbol, qty, position=position)
+            trade = save_trade(
+                self.db,
+                config.symbol,
+                close_side,
+                current_price,
+                qty,
+                pnl=pnl
+            )
         
         # AI 거래 로그 기록
         await self._log_trade(
@@ -430,7 +497,7 @@ class AITradingEngine:
             'EXIT',
             config.symbol,
             close_side,
-            position.qty,
+            qty,
             current_price,
             pnl,
             {'reason': reason}
@@ -439,7 +506,7 @@ class AITradingEngine:
         # 성과 업데이트
         await self._update_performance(config.id, pnl)
         
-        print(f"AI {config.name}: Closed {position.side} position @ {current_price:.2f}, PnL: {pnl:.2f} ({reason})")
+        print(f"AI {config.name}: Closed {side} position @ {current_price:.2f}, PnL: {pnl:.2f} ({reason})")
     
     async def _update_performance(self, config_id: int, pnl: float):
         """성과 업데이트"""
@@ -460,14 +527,16 @@ class AITradingEngine:
             config.sharpe_ratio = self._calculate_sharpe_ratio(config_id)
         
         self.db.commit()
+        AITradingEngine.mark_dirty()
         
         # 일일 성과 업데이트
         await self._update_daily_performance(config_id, pnl)
     
     def _calculate_sharpe_ratio(self, config_id: int) -> float:
         """샤프 비율 계산"""
+        self._flush_logs()  # 버퍼에 남은 EXIT 로그까지 포함
         # 최근 30일간의 거래 데이터로 샤프 비율 계산
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
         
         trades = self.db.query(AITradingLog).filter(
             and_(
@@ -525,6 +594,7 @@ class AITradingEngine:
             performance.avg_pnl_per_trade = performance.total_pnl / performance.total_trades
         
         self.db.commit()
+        AITradingEngine.mark_dirty()
     
     def get_strategy_status(self) -> Dict:
         """전략 상태 조회"""
@@ -1,4 +1,6 @@
 import asyncio
+import copy
+import json
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
@@ -28,6 +30,14 @@ class AITradingService:
         self.engine = AITradingService._shared_engine
         self.engine_task = AITradingService._shared_engine_task
     
+    def with_session(self, db: Session) -> "AITradingService":
+        """같은 서비스를 호출 단위 세션에 바인딩한 가벼운 뷰 반환"""
+        view = copy.copy(self)
+        view.db = db
+        view.engine = AITradingService._shared_engine
+        view.engine_task = AITradingService._shared_engine_task
+        return view
+
     async def start_ai_trading(self):
         """AI 트레이딩 시작"""
         # Refresh references to the shared objects
@@ -124,6 +134,7 @@ class AITradingService:
         
         self.db.add(config)
         self.db.commit()
+        AITradingEngine.mark_dirty()
         self.db.refresh(config)
         
         return {"status": "ok", "config_id": config.id, "message": f"Strategy '{name}' created"}
@@ -168,6 +179,7 @@ class AITradingService:
         
         config.is_active = not config.is_active
         self.db.commit()
+        AITradingEngine.mark_dirty()
         
         status = "activated" if config.is_active else "deactivated"
         return {"status": "ok", "message": f"Strategy '{config.name}' {status}"}
@@ -190,6 +202,7 @@ class AITradingService:
                 setattr(config, field, value)
         
         self.db.commit()
+        AITradingEngine.mark_dirty()
         
         return {"status": "ok", "message": f"Strategy '{config.name}' updated"}
     
@@ -205,9 +218,17 @@ class AITradingService:
         
         self.db.delete(config)
         self.db.commit()
+        AITradingEngine.mark_dirty()
         
         return {"status": "ok", "message": f"Strategy '{config.name}' deleted"}
     
+    @staticmethod
+    def _indicators_text(value) -> Optional[str]:
+        """API 응답은 기존처럼 JSON 문자열로 유지 (컬럼은 JSON/JSONB)"""
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value)
+    
     def get_strategy_logs(self, config_id: int, limit: int = 100) -> List[Dict]:
         """전략 로그 조회"""
         logs = self.db.query(AITradingLog).filter(
@@ -225,7 +246,7 @@ class AITradingService:
                 "price": log.price,
                 "pnl": log.pnl,
                 "confidence_score": log.confidence_score,
-                "technical_indicators": log.technical_indicators,
+                "technical_indicators": self._indicators_text(log.technical_indicators),
                 "market_sentiment": log.market_sentiment,
                 "risk_assessment": log.risk_assessment,
                 "reason": log.reason,
@@ -356,6 +377,7 @@ class AITradingService:
         self.db.query(AITradingPerformance).filter(AITradingPerformance.config_id == config_id).delete()
         
         self.db.commit()
+        AITradingEngine.mark_dirty()
         
         return {"status": "ok", "message": f"Performance data for '{config.name}' reset"}
     
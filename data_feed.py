@@ -1,8 +1,9 @@
 import asyncio
-import json
+import time
+import orjson
 import websockets
 from typing import List, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 
 RECONNECT_DELAY = 5
 
@@ -50,11 +51,11 @@ async def binance_listener(symbol: str):
     bc = get_broadcaster(symbol)
     while True:
         try:
-            async with websockets.connect(ws_url, ping_interval=60, ping_timeout=10) as ws:
-                print(f"[{datetime.utcnow()}] Connected to Binance websocket for {symbol}.")
+            async with websockets.connect(ws_url, ping_interval=60, ping_timeout=10, compression=None) as ws:
+                print(f"[{datetime.now(timezone.utc)}] Connected to Binance websocket for {symbol}.")
                 async for raw in ws:
                     try:
-                        data = json.loads(raw)
+                        data = orjson.loads(raw)
                         price = None
                         if "p" in data:
                             price = float(data["p"])
@@ -70,7 +71,7 @@ async def binance_listener(symbol: str):
                             "symbol": symbol.upper(),
                             "price": price,
                             "qty": qty,
-                            "timestamp": ts or int(datetime.utcnow().timestamp() * 1000)
+                            "timestamp": ts or int(time.time() * 1000)
                         }
                         await bc.broadcast(payload)
                     except Exception as e:
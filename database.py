@@ -4,13 +4,18 @@ from contextlib import contextmanager
 
 DATABASE_URL = "sqlite:///./trades.db"
 
+# LIFO keeps the hot few connections busy (and their caches warm) under WebSocket
+# + REST fan-out and lets idle overflow connections age out; pre_ping drops dead
+# connections before a WS loop stalls on them.
 engine = create_engine(
     DATABASE_URL, 
     connect_args={"check_same_thread": False},
-    pool_size=10,
-    max_overflow=20,
+    pool_size=20,
+    max_overflow=30,
     pool_timeout=30,
-    pool_recycle=3600
+    pool_recycle=1800,
+    pool_use_lifo=True,
+    pool_pre_ping=True
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -22,3 +27,13 @@ def get_db_session():
         yield db
     finally:
         db.close()
+
+@contextmanager
+def transaction(db):
+    """세션 작업을 하나의 트랜잭션으로 묶음 (정상 종료 시 커밋, 예외 시 롤백)"""
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -15,20 +15,31 @@ class ExchangeFactory:
         cache_key = f"{exchange_type}_{testnet}"
         
         if cache_key not in cls._exchanges:
-            if exchange_type == ExchangeType.BINANCE.value:
-                cls._exchanges[cache_key] = BinanceExchange(api_key, api_secret, testnet)
-            elif exchange_type == ExchangeType.BYBIT.value:
-                cls._exchanges[cache_key] = BybitExchange(api_key, api_secret, testnet)
-            else:
-                raise ValueError(f"Unsupported exchange type: {exchange_type}")
+            cls._exchanges[cache_key] = cls.create_exchange(exchange_type, api_key, api_secret, testnet)
         
         return cls._exchanges[cache_key]
     
+    @classmethod
+    def create_exchange(cls, exchange_type: str, api_key: str = None, 
+                        api_secret: str = None, testnet: bool = True) -> ExchangeInterface:
+        """캐시를 거치지 않고 새 거래소 인스턴스 생성"""
+        if exchange_type == ExchangeType.BINANCE.value:
+            return BinanceExchange(api_key, api_secret, testnet)
+        if exchange_type == ExchangeType.BYBIT.value:
+            return BybitExchange(api_key, api_secret, testnet)
+        raise ValueError(f"Unsupported exchange type: {exchange_type}")
+    
     @classmethod
     def get_available_exchanges(cls) -> list[str]:
         """사용 가능한 거래소 목록 반환"""
         return [exchange.value for exchange in ExchangeType]
     
+    @classmethod
+    async def close_all(cls):
+        """캐시된 거래소 인스턴스의 HTTP 세션 종료"""
+        for exchange in list(cls._exchanges.values()):
+            await exchange.close()
+    
     @classmethod
     def clear_cache(cls):
         """캐시 초기화"""
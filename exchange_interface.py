@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import aiohttp
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
@@ -46,6 +47,21 @@ class ExchangeInterface(ABC):
         self.api_secret = api_secret
         self.testnet = testnet
         self.name = self.get_exchange_name()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _http(self) -> aiohttp.ClientSession:
+        """REST 호출용 공유 세션 (keep-alive 연결 재사용, 첫 호출 시 생성)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def close(self):
+        """공유 세션 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     @abstractmethod
     def get_exchange_name(self) -> str:
@@ -1,6 +1,5 @@
 import asyncio
-import aiohttp
-import json
+import orjson
 import websockets
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -22,29 +21,29 @@ class BinanceExchange(ExchangeInterface):
         url = f"{self.base_url}/api/v3/ticker/price"
         params = {"symbol": symbol.upper()}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                return {
-                    "symbol": data["symbol"],
-                    "price": float(data["price"]),
-                    "timestamp": int(datetime.now().timestamp() * 1000)
-                }
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            return {
+                "symbol": data["symbol"],
+                "price": float(data["price"]),
+                "timestamp": int(datetime.now().timestamp() * 1000)
+            }
     
     async def get_orderbook(self, symbol: str, limit: int = 100) -> OrderBook:
         """오더북 조회"""
         url = f"{self.base_url}/api/v3/depth"
         params = {"symbol": symbol.upper(), "limit": limit}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                return OrderBook(
-                    symbol=data["symbol"],
-                    bids=[[float(bid[0]), float(bid[1])] for bid in data["bids"]],
-                    asks=[[float(ask[0]), float(ask[1])] for ask in data["asks"]],
-                    timestamp=int(datetime.now().timestamp() * 1000)
-                )
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            return OrderBook(
+                symbol=data["symbol"],
+                bids=[[float(bid[0]), float(bid[1])] for bid in data["bids"]],
+                asks=[[float(ask[0]), float(ask[1])] for ask in data["asks"]],
+                timestamp=int(datetime.now().timestamp() * 1000)
+            )
     
     async def get_klines(self, symbol: str, interval: str, limit: int = 500, 
                         start_time: int = None, end_time: int = None) -> List[Kline]:
@@ -61,44 +60,44 @@ class BinanceExchange(ExchangeInterface):
         if end_time:
             params["endTime"] = end_time
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                return [
-                    Kline(
-                        symbol=symbol.upper(),
-                        interval=interval,
-                        open_time=int(kline[0]),
-                        close_time=int(kline[6]),
-                        open=float(kline[1]),
-                        high=float(kline[2]),
-                        low=float(kline[3]),
-                        close=float(kline[4]),
-                        volume=float(kline[5]),
-                        quote_volume=float(kline[7]),
-                        trades_count=int(kline[8])
-                    )
-                    for kline in data
-                ]
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            return [
+                Kline(
+                    symbol=symbol.upper(),
+                    interval=interval,
+                    open_time=int(kline[0]),
+                    close_time=int(kline[6]),
+                    open=float(kline[1]),
+                    high=float(kline[2]),
+                    low=float(kline[3]),
+                    close=float(kline[4]),
+                    volume=float(kline[5]),
+                    quote_volume=float(kline[7]),
+                    trades_count=int(kline[8])
+                )
+                for kline in data
+            ]
     
     async def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Trade]:
         """최근 거래 내역 조회"""
         url = f"{self.base_url}/api/v3/trades"
         params = {"symbol": symbol.upper(), "limit": limit}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                return [
-                    Trade(
-                        symbol=trade["symbol"],
-                        price=float(trade["price"]),
-                        quantity=float(trade["qty"]),
-                        side=trade["isBuyerMaker"] and "sell" or "buy",
-                        timestamp=int(trade["time"])
-                    )
-                    for trade in data
-                ]
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            return [
+                Trade(
+                    symbol=trade["symbol"],
+                    price=float(trade["price"]),
+                    quantity=float(trade["qty"]),
+                    side=trade["isBuyerMaker"] and "sell" or "buy",
+                    timestamp=int(trade["time"])
+                )
+                for trade in data
+            ]
     
     async def place_order(self, symbol: str, side: str, order_type: str, 
                          quantity: float, price: float = None) -> Dict[str, Any]:
@@ -147,7 +146,7 @@ class BinanceExchange(ExchangeInterface):
     def parse_websocket_message(self, message: str) -> Optional[Dict[str, Any]]:
         """WebSocket 메시지 파싱"""
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             if "p" in data and "q" in data:
                 return {
                     "symbol": data.get("s", "").upper(),
@@ -156,6 +155,6 @@ class BinanceExchange(ExchangeInterface):
                     "side": "buy" if data.get("m", False) else "sell",
                     "timestamp": int(data.get("T", 0))
                 }
-        except (json.JSONDecodeError, KeyError, ValueError):
+        except (orjson.JSONDecodeError, KeyError, ValueError):
             pass
         return None
@@ -1,6 +1,5 @@
 import asyncio
-import aiohttp
-import json
+import orjson
 import websockets
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -22,16 +21,16 @@ class BybitExchange(ExchangeInterface):
         url = f"{self.base_url}/v5/market/tickers"
         params = {"category": "spot", "symbol": symbol.upper()}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                if data.get("retCode") == 0 and data.get("result", {}).get("list"):
-                    ticker = data["result"]["list"][0]
-                    return {
-                        "symbol": ticker["symbol"],
-                        "price": float(ticker["lastPrice"]),
-                        "timestamp": int(ticker["time"])
-                    }
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            if data.get("retCode") == 0 and data.get("result", {}).get("list"):
+                ticker = data["result"]["list"][0]
+                return {
+                    "symbol": ticker["symbol"],
+                    "price": float(ticker["lastPrice"]),
+                    "timestamp": int(ticker["time"])
+                }
         return {}
     
     async def get_orderbook(self, symbol: str, limit: int = 100) -> OrderBook:
@@ -39,17 +38,17 @@ class BybitExchange(ExchangeInterface):
         url = f"{self.base_url}/v5/market/orderbook"
         params = {"category": "spot", "symbol": symbol.upper(), "limit": limit}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                if data.get("retCode") == 0 and data.get("result"):
-                    orderbook = data["result"]
-                    return OrderBook(
-                        symbol=orderbook["s"],
-                        bids=[[float(bid[0]), float(bid[1])] for bid in orderbook["b"]],
-                        asks=[[float(ask[0]), float(ask[1])] for ask in orderbook["a"]],
-                        timestamp=int(orderbook["ts"])
-                    )
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            if data.get("retCode") == 0 and data.get("result"):
+                orderbook = data["result"]
+                return OrderBook(
+                    symbol=orderbook["s"],
+                    bids=[[float(bid[0]), float(bid[1])] for bid in orderbook["b"]],
+                    asks=[[float(ask[0]), float(ask[1])] for ask in orderbook["a"]],
+                    timestamp=int(orderbook["ts"])
+                )
         return OrderBook(symbol=symbol, bids=[], asks=[], timestamp=0)
     
     async def get_klines(self, symbol: str, interval: str, limit: int = 500, 
@@ -68,26 +67,26 @@ class BybitExchange(ExchangeInterface):
         if end_time:
             params["end"] = end_time
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                if data.get("retCode") == 0 and data.get("result", {}).get("list"):
-                    return [
-                        Kline(
-                            symbol=symbol.upper(),
-                            interval=interval,
-                            open_time=int(kline[0]),
-                            close_time=int(kline[0]) + self._interval_to_ms(interval),
-                            open=float(kline[1]),
-                            high=float(kline[2]),
-                            low=float(kline[3]),
-                            close=float(kline[4]),
-                            volume=float(kline[5]),
-                            quote_volume=float(kline[6]),
-                            trades_count=int(kline[7])
-                        )
-                        for kline in data["result"]["list"]
-                    ]
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            if data.get("retCode") == 0 and data.get("result", {}).get("list"):
+                return [
+                    Kline(
+                        symbol=symbol.upper(),
+                        interval=interval,
+                        open_time=int(kline[0]),
+                        close_time=int(kline[0]) + self._interval_to_ms(interval),
+                        open=float(kline[1]),
+                        high=float(kline[2]),
+                        low=float(kline[3]),
+                        close=float(kline[4]),
+                        volume=float(kline[5]),
+                        quote_volume=float(kline[6]),
+                        trades_count=int(kline[7])
+                    )
+                    for kline in data["result"]["list"]
+                ]
         return []
     
     async def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Trade]:
@@ -95,20 +94,20 @@ class BybitExchange(ExchangeInterface):
         url = f"{self.base_url}/v5/market/recent-trade"
         params = {"category": "spot", "symbol": symbol.upper(), "limit": limit}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                if data.get("retCode") == 0 and data.get("result", {}).get("list"):
-                    return [
-                        Trade(
-                            symbol=trade["symbol"],
-                            price=float(trade["price"]),
-                            quantity=float(trade["size"]),
-                            side=trade["side"].lower(),
-                            timestamp=int(trade["time"])
-                        )
-                        for trade in data["result"]["list"]
-                    ]
+        session = self._http()
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            if data.get("retCode") == 0 and data.get("result", {}).get("list"):
+                return [
+                    Trade(
+                        symbol=trade["symbol"],
+                        price=float(trade["price"]),
+                        quantity=float(trade["size"]),
+                        side=trade["side"].lower(),
+                        timestamp=int(trade["time"])
+                    )
+                    for trade in data["result"]["list"]
+                ]
         return []
     
     async def place_order(self, symbol: str, side: str, order_type: str, 
@@ -155,8 +154,8 @@ class BybitExchange(ExchangeInterface):
     def parse_websocket_message(self, message: str) -> Optional[Dict[str, Any]]:
         """WebSocket 메시지 파싱"""
         try:
-            data = json.loads(message)
-            if data.get("topic") == f"publicTrade.{symbol.upper()}" and data.get("data"):
+            data = orjson.loads(message)
+            if data.get("topic", "").startswith("publicTrade.") and data.get("data"):
                 trade_data = data["data"][0]
                 return {
                     "symbol": trade_data["s"],
@@ -165,7 +164,7 @@ class BybitExchange(ExchangeInterface):
                     "side": trade_data["S"].lower(),
                     "timestamp": int(trade_data["T"])
                 }
-        except (json.JSONDecodeError, KeyError, ValueError):
+        except (orjson.JSONDecodeError, KeyError, ValueError):
             pass
         return None
     
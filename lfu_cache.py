@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# lookup table that halves every 4-bit counter in one bytes.translate pass
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+class TinyLFUCache:
+    """
+    Bounded TTL cache with TinyLFU admission.
+
+    Entries are kept in LRU order. When the cache is full a new key only
+    replaces the LRU victim if its estimated access frequency (count-min
+    sketch, 4-bit saturating counters) is at least the victim's, so a client
+    cycling through more symbols than fit cannot flush the hot entries.
+    Counters are halved every `capacity * 10` accesses to age out old history.
+    """
+
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+    _MAX_COUNT = 15
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._width = max(64, capacity * 10)
+        self._sketch = [bytearray(self._width) for _ in self._SEEDS]
+        self._sample_size = self._width
+        self._additions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+
+    def _slots(self, key: Hashable):
+        width = self._width
+        return [hash((seed, key)) % width for seed in self._SEEDS]
+
+    def _increment(self, key: Hashable):
+        for row, i in zip(self._sketch, self._slots(key)):
+            if row[i] < self._MAX_COUNT:
+                row[i] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._sketch = [row.translate(_HALVE) for row in self._sketch]
+            self._additions //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return min(row[i] for row, i in zip(self._sketch, self._slots(key)))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        self._increment(key)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        now = time.time()
+        entry = (now + ttl, value)
+        if key in self._data:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            return
+        if len(self._data) >= self.capacity:
+            victim = next(iter(self._data))
+            victim_expired = self._data[victim][0] <= now
+            if not victim_expired and self.frequency(key) < self.frequency(victim):
+                # the LRU victim is still hotter than the newcomer: reject admission
+                return
+            del self._data[victim]
+        self._data[key] = entry
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -4,10 +4,12 @@ from typing import Optional, Dict, List
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import FileResponse, Response, PlainTextResponse
-from pydantic import BaseModel
-from database import SessionLocal, engine, get_db_session
-from models import Base
+from pydantic import BaseModel, ConfigDict, ValidationError
+from database import SessionLocal, engine, get_db_session, transaction
+from models import Base, Trade
 from data_feed import ensure_symbol_listener, get_broadcaster
 from multi_exchange_data_feed import multi_exchange_feed
 from exchange_factory import ExchangeFactory
@@ -15,9 +17,12 @@ from trading_config import TradingConfig, TradingManager, TradingMode, ExchangeC
 from real_trading_service import RealTradingService
 from multi_symbol_service import multi_symbol_service
 from ai_trading_service import AITradingService
+from ai_trading_engine import AITradingEngine
 from trade_service import save_trade
 from report_service import get_daily_pnl
-from position_service import PositionService
+from position_service import PositionService, realized_pnl, preload_marks, flush_marks
+from lfu_cache import TinyLFUCache
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import time
 import random
@@ -26,9 +31,38 @@ import urllib.request
 import urllib.error
 import urllib.parse
 import json as pyjson
+import functools
+import logging
+import logging.handlers
+from queue import SimpleQueue
+import hashlib
+import zlib
+import orjson
+from ws_json import ws_text
 import os
 
-Base.metadata.create_all(bind=engine)
+# WebSocket handlers log through a queue drained by a background thread, so a
+# burst of errors never blocks the event loop on a synchronous stderr write.
+# The draining listener is started/stopped by the lifespan (one per app run), so a
+# second lifespan (tests, reload) gets a live listener; records queued before
+# startup are written once it starts.
+logger = logging.getLogger("scalping")
+logger.propagate = False
+_log_queue: SimpleQueue = SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def _start_log_listener():
+    global _log_listener
+    if _log_listener is None:
+        _log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+        _log_listener.start()
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
 
 # 실제 거래 설정 초기화
 trading_config = TradingConfig(mode=TradingMode.SIMULATION)
@@ -36,19 +70,84 @@ trading_manager = TradingManager(trading_config)
 real_trading_service = RealTradingService(trading_manager)
 
 # AI 트레이딩 서비스 초기화
-def get_ai_trading_service():
+# One process-wide service; each call binds its own short-lived session via with_session().
+_ai_service: Optional[AITradingService] = None
+
+def get_ai_trading_service(db: Session) -> AITradingService:
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AITradingService(db, real_trading_service)
+    return _ai_service.with_session(db)
+
+# Polled AI snapshots (status/dashboard) are shared by all callers for a short TTL
+# and dropped as soon as AITradingEngine.data_version moves (any AI table write).
+_AI_SNAPSHOT_TTL = 1.0
+_ai_snapshots: Dict[str, tuple] = {}
+
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _ai_changed():
+    """Drop cached AI snapshots and push a status update to /ws/ai-trading clients."""
+    _ai_snapshots.clear()
+    if _ai_service is not None and _ai_service.engine is not None and _main_loop is not None:
+        # sync endpoints run in the threadpool; asyncio queues must be touched on the loop
+        _main_loop.call_soon_threadsafe(_ai_service.engine.notify_status_change)
+
+def _ai_snapshot(method: str):
+    """Result of AITradingService.<method>(), reused for _AI_SNAPSHOT_TTL seconds while the AI data version is unchanged."""
+    now = time.time()
+    version = AITradingEngine.data_version
+    hit = _ai_snapshots.get(method)
+    if hit and hit[1] == version and now - hit[0] < _AI_SNAPSHOT_TTL:
+        return hit[2]
+    with get_db_session() as db:
+        value = getattr(get_ai_trading_service(db), method)()
+    _ai_snapshots[method] = (now, version, value)
+    return value
+
+# Position marks are updated in memory on every price read/tick (position_service
+# mark cache) and written back in one bulk UPDATE per interval.
+_POSITION_MARK_FLUSH_INTERVAL = 0.5
+
+def _flush_position_marks():
     with get_db_session() as db:
-        return AITradingService(db, real_trading_service)
+        return flush_marks(db)
+
+async def _flush_position_marks_periodically():
+    while True:
+        await asyncio.sleep(_POSITION_MARK_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(_flush_position_marks)
+        except Exception as e:
+            logger.warning("Position mark flush failed: %s", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    loop = asyncio.get_event_loop()
+    _start_log_listener()
+    # Schema bootstrap runs once per process at startup rather than on import;
+    # set AUTO_CREATE_TABLES=false where the schema is managed externally.
+    if os.getenv("AUTO_CREATE_TABLES", "true").strip().lower() == "true":
+        Base.metadata.create_all(bind=engine)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    global _main_loop
+    loop = _main_loop = asyncio.get_running_loop()
+    with get_db_session() as db:
+        preload_marks(db)
+    mark_flusher = loop.create_task(_flush_position_marks_periodically())
     # start default BTCUSDT listener
     loop.create_task(ensure_symbol_listener('BTCUSDT'))
     yield
     # Shutdown
     # listeners will naturally stop when process exits
+    mark_flusher.cancel()
+    _flush_position_marks()
+    await real_trading_service.close()
+    await ExchangeFactory.close_all()
+    _stop_log_listener()
 
 app = FastAPI(title="Scalping Trainer", version="1.0.0", lifespan=lifespan)
 
@@ -94,19 +193,32 @@ def get_db():
 async def read_index():
     return FileResponse('index.html')
 
-@app.post("/api/trade")
-def create_trade(trade_request: TradeRequest, db: Session = Depends(get_db)):
-    # Update database position and compute pnl if applicable
-    pnl = update_position_on_trade(
-        db=db,
-        symbol=trade_request.symbol,
-        side=trade_request.side.upper(),
-        price=trade_request.price,
-        qty=trade_request.qty
-    )
-    trade = save_trade(db, trade_request.symbol, trade_request.side, trade_request.price, trade_request.qty, pnl=pnl)
+def _execute_trade(db: Session, trade_request: TradeRequest) -> dict:
+    # Update database position and compute pnl if applicable; position + trade commit together
+    with transaction(db):
+        pnl = update_position_on_trade(
+            db=db,
+            symbol=trade_request.symbol,
+            side=trade_request.side.upper(),
+            price=trade_request.price,
+            qty=trade_request.qty
+        )
+        trade = save_trade(db, trade_request.symbol, trade_request.side, trade_request.price, trade_request.qty, pnl=pnl)
+    _invalidate_positions(trade_request.symbol)
     return {"status": "ok", "trade_id": trade.id, "pnl": pnl}
 
+@app.post("/api/trade", openapi_extra={
+    "requestBody": {"required": True, "content": {"application/json": {"schema": TradeRequest.model_json_schema()}}}
+})
+async def create_trade(request: Request, db: Session = Depends(get_db)):
+    # Hot path: parse + validate the raw body in one pydantic-core pass instead of
+    # FastAPI's generic body handling, then run the blocking DB work off the loop.
+    try:
+        trade_request = TradeRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await run_in_threadpool(_execute_trade, db, trade_request)
+
 @app.get("/api/report/daily")
 def daily_report(date_str: str, db: Session = Depends(get_db)):
     report = get_daily_pnl(db, date_str)
@@ -114,33 +226,38 @@ def daily_report(date_str: str, db: Session = Depends(get_db)):
 
 @app.get("/api/trades")
 def get_trades(db: Session = Depends(get_db)):
-    from models import Trade
-    trades = db.query(Trade).order_by(Trade.timestamp.desc()).limit(50).all()
+    # Core select: project the columns straight from rows, no ORM hydration
+    stmt = select(
+        Trade.id, Trade.symbol, Trade.side, Trade.price, Trade.qty, Trade.timestamp, Trade.pnl
+    ).order_by(Trade.timestamp.desc()).limit(50)
     return [
         {
-            "id": trade.id,
-            "symbol": trade.symbol,
-            "side": trade.side,
-            "price": trade.price,
-            "qty": trade.qty,
-            "timestamp": trade.timestamp.isoformat() if trade.timestamp else None,
-            "pnl": trade.pnl
+            "id": r.id,
+            "symbol": r.symbol,
+            "side": r.side,
+            "price": r.price,
+            "qty": r.qty,
+            "timestamp": r.timestamp.isoformat() if r.timestamp else None,
+            "pnl": r.pnl
         }
-        for trade in trades
+        for r in db.execute(stmt).all()
     ]
 
-_candle_cache = {}
 _CANDLE_TTL_SECONDS = 30
+_CANDLE_CACHE_SIZE = int(os.getenv("CANDLE_CACHE_SIZE", "256"))
+_candle_cache = TinyLFUCache(_CANDLE_CACHE_SIZE)
+# cache_key -> fetch task shared by concurrent requests waiting on the same upstream fetch
+_inflight: Dict[str, asyncio.Task] = {}
 
 # ----------------------
 # Optional Redis client (for multi-instance deployments)
 # ----------------------
 _redis = None
 try:
-    import redis  # type: ignore
+    import redis.asyncio as aredis  # type: ignore
     REDIS_URL = os.getenv("REDIS_URL")
     if REDIS_URL:
-        _redis = redis.from_url(REDIS_URL, decode_responses=True)
+        _redis = aredis.from_url(REDIS_URL, decode_responses=True)
 except Exception:
     _redis = None
 
@@ -154,15 +271,25 @@ try:
     CANDLE_CACHE_MISS = Counter('candle_cache_miss_total', 'Candle cache misses')
     RL_HIT = Counter('rate_limit_exceeded_total', 'Rate limit exceeded events')
     RETRIES = Counter('upstream_retries_total', 'Upstream retry attempts')
+    WS_ERRORS = Counter('ws_error_total', 'WebSocket error events', ['kind'])
     _metrics = {
         'hit': CANDLE_CACHE_HIT,
         'miss': CANDLE_CACHE_MISS,
         'rl': RL_HIT,
         'retry': RETRIES,
+        'ws_error': WS_ERRORS,
     }
 except Exception:
     _metrics = None
 
+# Frames stay text because the frontend JSON.parses event.data; numpy values
+# (e.g. strategy indicators in ai_status) are handled by ws_json.
+_ws_text = ws_text
+
+def _count_ws_error(kind: str):
+    if _metrics:
+        _metrics['ws_error'].labels(kind=kind).inc()
+
 # ----------------------
 # Simple in-memory rate limiter (sliding window)
 # ----------------------
@@ -170,40 +297,67 @@ _rate_buckets: Dict[str, deque] = defaultdict(deque)
 _RL_WINDOW_SEC = 10  # sliding window length
 _RL_MAX_CALLS = 20   # max allowed calls per window per key
 
-def _rl_check(key: str):
-    now = time.time()
-    if _redis is not None:
-        zkey = f"rl:{key}"
-        pipe = _redis.pipeline()
-        cutoff = now - _RL_WINDOW_SEC
-        pipe.zremrangebyscore(zkey, 0, cutoff)
-        pipe.zadd(zkey, {str(now): now})
-        pipe.zcard(zkey)
-        pipe.expire(zkey, _RL_WINDOW_SEC)
-        _, _, count, _ = pipe.execute()
-        if count is not None and int(count) > _RL_MAX_CALLS:
-            if _metrics:
-                _metrics['rl'].inc()
-            raise HTTPException(status_code=429, detail="Rate limit exceeded. Please slow down.")
-        return
-    # fallback in-memory
-    dq = _rate_buckets[key]
-    while dq and now - dq[0] > _RL_WINDOW_SEC:
-        dq.popleft()
-    if len(dq) >= _RL_MAX_CALLS:
-        if _metrics:
-            _metrics['rl'].inc()
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please slow down.")
-    dq.append(now)
-
-
-def _cache_get(key: str):
+# Sliding-window check for every key in one round trip.
+# KEYS = limiter keys, ARGV = now, window, max calls. Returns 1 per key over the limit.
+_RL_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local max_calls = tonumber(ARGV[3])
+local res = {}
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+    redis.call('ZADD', key, now, ARGV[1])
+    local count = redis.call('ZCARD', key)
+    redis.call('EXPIRE', key, window)
+    res[i] = count > max_calls and 1 or 0
+end
+return res
+"""
+_rl_script = _redis.register_script(_RL_LUA) if _redis is not None else None
+
+
+_RL_ARGS_TAIL = [_RL_WINDOW_SEC, _RL_MAX_CALLS]
+
+
+async def _rl_check_many(keys: List[str], _now=time.time) -> List[bool]:
+    """Return, per key, whether this call exceeds the rate limit."""
+    now = _now()
+    if _rl_script is not None:
+        flags = await _rl_script(keys=["rl:" + k for k in keys], args=[now, *_RL_ARGS_TAIL])
+        return [f == 1 for f in flags]
+    # fallback in-memory; hot names bound to locals once per call
+    window = _RL_WINDOW_SEC
+    max_calls = _RL_MAX_CALLS
+    buckets = _rate_buckets
+    exceeded = []
+    append = exceeded.append
+    for key in keys:
+        dq = buckets[key]
+        cutoff = now - window
+        while dq and dq[0] < cutoff:
+            dq.popleft()
+        if len(dq) >= max_calls:
+            append(True)
+            continue
+        dq.append(now)
+        append(False)
+    return exceeded
+
+
+def _etag(blob: bytes) -> str:
+    return '"' + hashlib.blake2b(blob, digest_size=8).hexdigest() + '"'
+
+
+async def _cache_get(key: str):
+    """Return (timestamp, json_bytes, etag) or None."""
     if _redis is not None:
-        val = _redis.get(key)
+        val = await _redis.get(key)
         if val:
             try:
                 if _metrics: _metrics['hit'].inc()
-                return pyjson.loads(val)
+                # Redis expires entries itself, so a hit is always fresh
+                blob = val.encode()
+                return time.time(), blob, _etag(blob)
             except Exception:
                 return None
         if _metrics: _metrics['miss'].inc()
@@ -216,14 +370,18 @@ def _cache_get(key: str):
     return v
 
 
-def _cache_set(key: str, value, ttl: int):
+async def _cache_set(key: str, value, ttl: int):
+    """Serialize and cache value once; return (json_bytes, etag) for the response."""
+    blob = orjson.dumps(value)
+    etag = _etag(blob)
     if _redis is not None:
         try:
-            _redis.setex(key, ttl, pyjson.dumps(value))
-            return
+            await _redis.setex(key, ttl, blob)
+            return blob, etag
         except Exception:
             pass
-    _candle_cache[key] = (time.time(), value)
+    _candle_cache.set(key, (time.time(), blob, etag), ttl)
+    return blob, etag
 
 
 def _binance_fetch_with_retry(url: str, max_retries: int = 3, base_delay: float = 0.3):
@@ -273,63 +431,104 @@ def _binance_fetch_with_retry(url: str, max_retries: int = 3, base_delay: float
     raise HTTPException(status_code=502, detail=f"Upstream fetch failed: {last_err}")
 
 
+@functools.lru_cache(maxsize=256)
+def _klines_url(symbol: str, interval: str, limit: int, start: int | None, end: int | None) -> str:
+    base_params = {
+        "symbol": symbol,
+        "interval": interval,
+        "limit": limit,
+    }
+    if start:
+        base_params["startTime"] = int(start)
+    if end:
+        base_params["endTime"] = int(end)
+    params = urllib.parse.urlencode(base_params)
+    return f"https://api.binance.com/api/v3/klines?{params}"
+
+
+def _klines_to_candles(arr) -> list:
+    candles = []
+    for k in arr:
+        # [ openTime, open, high, low, close, volume, closeTime, ... ]
+        open_time_ms = k[0]
+        open_p = float(k[1])
+        high_p = float(k[2])
+        low_p = float(k[3])
+        close_p = float(k[4])
+        vol = float(k[5])
+        candles.append({
+            "time": int(open_time_ms // 1000),
+            "open": round(open_p, 2),
+            "high": round(high_p, 2),
+            "low": round(low_p, 2),
+            "close": round(close_p, 2),
+            "volume": round(vol, 6),
+        })
+    return candles
+
+
+async def _fetch_candles(cache_key: str, url: str):
+    try:
+        arr = await asyncio.to_thread(_binance_fetch_with_retry, url)
+        candles = _klines_to_candles(arr)
+        return await _cache_set(cache_key, candles, _CANDLE_TTL_SECONDS)
+    finally:
+        _inflight.pop(cache_key, None)
+
+
+async def _fetch_candles_shared(cache_key: str, url: str):
+    """
+    Fetch, convert and cache candles for cache_key. Concurrent misses on the same
+    key share a single upstream request instead of each hitting Binance.
+    The fetch runs in its own task and every caller (the first one included)
+    awaits it through asyncio.shield, so a cancelled request never cancels the
+    fetch the other callers are waiting on.
+    Returns (json_bytes, etag).
+    """
+    task = _inflight.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_candles(cache_key, url))
+        _inflight[cache_key] = task
+        # retrieve the exception even if every waiter was cancelled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return await asyncio.shield(task)
+
+
 @app.get("/api/candles")
-def get_candles(request: Request, symbol: str = "BTCUSDT", interval: str = "1m", limit: int = 500, startTime: int | None = None, endTime: int | None = None):
+async def get_candles(request: Request, symbol: str = "BTCUSDT", interval: str = "1m", limit: int = 500, startTime: int | None = None, endTime: int | None = None):
     """
     Fetch recent candles from Binance and return lightweight-charts friendly format.
     Response: [{ time: epoch_sec, open, high, low, close }]
+    Honors If-None-Match with 304 while the cached entry is fresh.
     """
     try:
         # per-IP + global limiter keys
         client_ip = request.client.host if request and request.client else "unknown"
-        _rl_check(f"candles:ip:{client_ip}")
-        _rl_check("candles:global")
+        if any(await _rl_check_many([f"candles:ip:{client_ip}", "candles:global"])):
+            if _metrics:
+                _metrics['rl'].inc()
+            raise HTTPException(status_code=429, detail="Rate limit exceeded. Please slow down.")
 
         cache_key = f"candles:{symbol.upper()}:{interval}:{max(1, min(limit, 1000))}:{startTime or ''}:{endTime or ''}"
         now = time.time()
-        # Redis cache returns value only, in-memory stores (timestamp, value)
-        cached = _cache_get(cache_key)
+        cached = await _cache_get(cache_key)
         if cached:
-            # If Redis provided, cached is the value directly
-            if _redis is not None:
-                return cached
-            # in-memory tuple structure
-            if isinstance(cached, tuple) and len(cached) == 2:
-                ts, val = cached
-                if now - ts < _CANDLE_TTL_SECONDS:
-                    return val
-
-        base_params = {
-            "symbol": symbol.upper(),
-            "interval": interval,
-            "limit": max(1, min(limit, 1000)),
-        }
-        if startTime:
-            base_params["startTime"] = int(startTime)
-        if endTime:
-            base_params["endTime"] = int(endTime)
-        params = urllib.parse.urlencode(base_params)
-        url = f"https://api.binance.com/api/v3/klines?{params}"
-        arr = _binance_fetch_with_retry(url)
-        candles = []
-        for k in arr:
-            # [ openTime, open, high, low, close, volume, closeTime, ... ]
-            open_time_ms = k[0]
-            open_p = float(k[1])
-            high_p = float(k[2])
-            low_p = float(k[3])
-            close_p = float(k[4])
-            vol = float(k[5])
-            candles.append({
-                "time": int(open_time_ms // 1000),
-                "open": round(open_p, 2),
-                "high": round(high_p, 2),
-                "low": round(low_p, 2),
-                "close": round(close_p, 2),
-                "volume": round(vol, 6),
-            })
-        _cache_set(cache_key, candles, _CANDLE_TTL_SECONDS)
-        return candles
+            ts, blob, etag = cached
+            if now - ts < _CANDLE_TTL_SECONDS:
+                headers = {"ETag": etag, "Cache-Control": f"max-age={_CANDLE_TTL_SECONDS}"}
+                if request.headers.get("if-none-match") == etag:
+                    return Response(status_code=304, headers=headers)
+                headers["X-Cache"] = "HIT"
+                # already-encoded body: skip FastAPI's per-request JSON encoding
+                return Response(content=blob, media_type="application/json", headers=headers)
+
+        url = _klines_url(symbol.upper(), interval, max(1, min(limit, 1000)), startTime, endTime)
+        blob, etag = await _fetch_candles_shared(cache_key, url)
+        return Response(content=blob, media_type="application/json", headers={
+            "ETag": etag,
+            "Cache-Control": f"max-age={_CANDLE_TTL_SECONDS}",
+            "X-Cache": "MISS",
+        })
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -337,17 +536,23 @@ def get_candles(request: Request, symbol: str = "BTCUSDT", interval: str = "1m",
 # ----------------------
 # Health/Ready/Metric endpoints
 # ----------------------
+# Static bodies are encoded once; Response objects are still built per request
+# because middleware (e.g. CORS) appends to their header list in place.
+_HEALTHZ_BYTES = orjson.dumps({"status": "ok"})
+_METRICS_DISABLED_BYTES = b"metrics disabled"
+
+
 @app.get("/healthz")
 def healthz():
-    return {"status": "ok"}
+    return Response(_HEALTHZ_BYTES, media_type="application/json")
 
 
 @app.get("/readyz")
-def readyz():
+async def readyz():
     if _redis is None:
         return {"status": "ok", "redis": "disabled"}
     try:
-        _redis.ping()
+        await _redis.ping()
         return {"status": "ok", "redis": "connected"}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"redis not ready: {e}")
@@ -356,7 +561,7 @@ def readyz():
 @app.get("/metrics")
 def metrics():
     if _metrics is None:
-        return PlainTextResponse("metrics disabled", status_code=200)
+        return PlainTextResponse(_METRICS_DISABLED_BYTES, status_code=200)
     try:
         return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
     except Exception as e:
@@ -378,25 +583,27 @@ async def price_ws_endpoint(websocket: WebSocket):
     try:
         # Send latest price immediately if available
         if bc.latest_price:
-            await websocket.send_json(bc.latest_price)
+            await websocket.send_text(_ws_text(bc.latest_price))
         
         # Keep connection alive with periodic pings
         while True:
             try:
                 # Wait for new data with timeout
                 payload = await asyncio.wait_for(queue.get(), timeout=30.0)
-                await websocket.send_json(payload)
+                await websocket.send_text(_ws_text(payload))
             except asyncio.TimeoutError:
                 # Send ping to keep connection alive
-                await websocket.send_json({"type": "ping", "timestamp": int(time.time() * 1000)})
+                await websocket.send_text(_ws_text({"type": "ping", "timestamp": int(time.time() * 1000)}))
             except Exception as e:
-                print(f"Error sending WebSocket message: {e}")
+                _count_ws_error('send')
+                logger.warning("Error sending WebSocket message: %s", e)
                 break
                 
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected for {symbol}")
+        logger.info("WebSocket disconnected for %s", symbol)
     except Exception as e:
-        print(f"WebSocket error for {symbol}: {e}")
+        _count_ws_error('handler')
+        logger.warning("WebSocket error for %s: %s", symbol, e)
     finally:
         await bc.unregister(queue)
 
@@ -407,6 +614,18 @@ async def price_ws_endpoint(websocket: WebSocket):
 def get_position_service(db: Session = Depends(get_db)) -> PositionService:
     return PositionService(db)
 
+def _latest_price(symbol: str) -> Optional[float]:
+    """Latest streamed price for symbol, or None if nothing has arrived yet."""
+    try:
+        lp = get_broadcaster(symbol).latest_price
+        if isinstance(lp, dict):
+            return lp.get("price")
+        if isinstance(lp, (int, float)):
+            return float(lp)
+    except Exception:
+        pass
+    return None
+
 def update_position_on_trade(db: Session, symbol: str, side: str, price: float, qty: float) -> float:
     """
     Update position with a new trade and return realized PnL if any (for the closing portion).
@@ -415,12 +634,11 @@ def update_position_on_trade(db: Session, symbol: str, side: str, price: float,
     - Opposite side: reduce existing qty; if flipped, set new side/entry.
     """
     position_service = PositionService(db)
-    position = position_service.get_position(symbol)
-    realized_pnl = 0.0
+    position = position_service.get_position_for_update(symbol)
 
     if not position or position.qty == 0 or position.side is None:
         # Open new position
-        position_service.create_or_update_position(symbol, side, qty, price, price)
+        position_service.create_or_update_position(symbol, side, qty, price, price, position=position)
         return 0.0
 
     if side == position.side:
@@ -428,37 +646,22 @@ def update_position_on_trade(db: Session, symbol: str, side: str, price: float,
         new_qty = position.qty + qty
         if new_qty > 0:
             new_entry_price = (position.entry_price * position.qty + price * qty) / new_qty
-            position_service.create_or_update_position(symbol, side, new_qty, new_entry_price, price)
+            position_service.create_or_update_position(symbol, side, new_qty, new_entry_price, price, position=position)
         return 0.0
-    else:
-        # Reduce or flip
-        if qty < position.qty:
-            # Partial close
-            if position.side == 'BUY':
-                realized_pnl = (price - position.entry_price) * qty
-            else:
-                realized_pnl = (position.entry_price - price) * qty
-            new_qty = position.qty - qty
-            position_service.create_or_update_position(symbol, position.side, new_qty, position.entry_price, price)
-        elif qty == position.qty:
-            # Full close
-            if position.side == 'BUY':
-                realized_pnl = (price - position.entry_price) * qty
-            else:
-                realized_pnl = (position.entry_price - price) * qty
-            position_service.close_position(symbol, qty)
-        else:
-            # Flip position: close existing then open new with remaining
-            close_qty = position.qty
-            if position.side == 'BUY':
-                realized_pnl = (price - position.entry_price) * close_qty
-            else:
-                realized_pnl = (position.entry_price - price) * close_qty
-            # Open new
-            remaining = qty - close_qty
-            position_service.create_or_update_position(symbol, side, remaining, price, price)
 
-        return realized_pnl
+    # Reduce or flip: only the existing qty realizes PnL
+    pnl = realized_pnl(position.side, position.entry_price, price, min(qty, position.qty))
+    remaining = position.qty - qty
+    if remaining > 0:
+        # Partial close
+        position_service.create_or_update_position(symbol, position.side, remaining, position.entry_price, price, position=position)
+    elif remaining == 0:
+        # Full close
+        position_service.close_position(symbol, qty, position=position)
+    else:
+        # Flip position: open new with remaining
+        position_service.create_or_update_position(symbol, side, -remaining, price, price, position=position)
+    return pnl
 
 
 class ClosePositionRequest(BaseModel):
@@ -467,28 +670,44 @@ class ClosePositionRequest(BaseModel):
     qty: Optional[float] = None    # if not provided, close full
 
 
+# Short-lived snapshots for polled position reads, keyed by symbol ("*" = all).
+# Every position-mutating endpoint drops the affected entries.
+_POS_TTL = 1.0
+_pos_cache: Dict[str, tuple] = {}
+
+
+def _pos_cache_get(key: str):
+    hit = _pos_cache.get(key)
+    if hit and time.time() - hit[0] < _POS_TTL:
+        return hit[1]
+    return None
+
+
+def _invalidate_positions(symbol: str):
+    _pos_cache.pop(symbol.upper(), None)
+    _pos_cache.pop("*", None)
+
+
 @app.get("/api/position")
 def get_position(symbol: str = "BTCUSDT", db: Session = Depends(get_db)):
+    cached = _pos_cache_get(symbol.upper())
+    if cached is not None:
+        return cached
     position_service = PositionService(db)
-    pos = position_service.get_position(symbol)
     
     # Get latest price and update position
-    latest = None
-    try:
-        bc = get_broadcaster(symbol)
-        if bc.latest_price and isinstance(bc.latest_price, dict):
-            latest = bc.latest_price.get("price")
-        elif isinstance(bc.latest_price, (int, float)):
-            latest = bc.latest_price
-    except Exception:
-        latest = None
+    latest = _latest_price(symbol)
     
-    # Update position with latest price if available
-    if latest and pos:
-        position_service.update_position_price(symbol, latest)
-        pos = position_service.get_position(symbol)  # Refresh position
+    # Mark the latest price in memory if available (no DB write; the mark flusher persists it);
+    # returns None when there is no position
+    if latest:
+        pos = position_service.update_position_price(symbol, latest)
+    else:
+        pos = position_service.get_position_row(symbol)
     
-    return position_service.to_dict(pos)
+    result = position_service.to_dict(pos)
+    _pos_cache[symbol.upper()] = (time.time(), result)
+    return result
 
 
 @app.post("/api/position/close")
@@ -498,72 +717,61 @@ def close_position(req: ClosePositionRequest, db: Session = Depends(get_db)):
     # Determine price
     price = req.price
     if price is None:
-        try:
-            bc = get_broadcaster(req.symbol)
-            if bc.latest_price and isinstance(bc.latest_price, dict):
-                price = bc.latest_price.get("price")
-            elif isinstance(bc.latest_price, (int, float)):
-                price = bc.latest_price
-        except Exception:
-            pass
+        price = _latest_price(req.symbol)
     
     if price is None:
         return {"status": "error", "message": "No price available to close position"}
 
-    # Snapshot current position before closing
-    before = position_service.get_position(req.symbol)
-    if not before or before.qty <= 0:
+    # Validate with a non-locking read before taking any lock
+    snapshot = position_service.get_position_row(req.symbol)
+    if not snapshot or snapshot.qty <= 0:
         return {"status": "error", "message": "No active position to close"}
-    
-    prev_side = before.side
-    prev_qty = before.qty
-
-    # Compute realized PnL
-    closed_qty = prev_qty if (req.qty is None or req.qty >= prev_qty) else req.qty
-    if prev_side == 'BUY':
-        realized = (price - before.entry_price) * closed_qty
-    else:  # SELL
-        realized = (before.entry_price - price) * closed_qty
-
-    # Close position in database
-    position_service.close_position(req.symbol, closed_qty)
-
-    # Record a closing trade for auditability using the opposite side
-    if prev_side == 'BUY':
-        close_side = 'SELL'
-    elif prev_side == 'SELL':
-        close_side = 'BUY'
-    else:
-        close_side = 'CLOSE'
-    save_trade(db, req.symbol, close_side, price, closed_qty, pnl=realized)
+
+    # Close position in database and record the trade in one transaction
+    with transaction(db):
+        # Lock the row and re-check: another fill may have closed it since the snapshot
+        before = position_service.get_position_for_update(req.symbol)
+        if not before or before.qty <= 0:
+            return {"status": "error", "message": "No active position to close"}
+
+        prev_side = before.side
+        prev_qty = before.qty
+
+        # Compute realized PnL
+        closed_qty = prev_qty if (req.qty is None or req.qty >= prev_qty) else req.qty
+        realized = realized_pnl(prev_side, before.entry_price, price, closed_qty)
+
+        # Record a closing trade for auditability using the opposite side
+        if prev_side == 'BUY':
+            close_side = 'SELL'
+        elif prev_side == 'SELL':
+            close_side = 'BUY'
+        else:
+            close_side = 'CLOSE'
+
+        position_service.close_position(req.symbol, closed_qty, position=before)
+        save_trade(db, req.symbol, close_side, price, closed_qty, pnl=realized)
+    _invalidate_positions(req.symbol)
 
     return {"status": "ok", "realized_pnl": realized, "price": price, "closed_qty": closed_qty}
 
 @app.get("/api/positions")
 def get_all_positions(db: Session = Depends(get_db)):
     """모든 활성 포지션 조회"""
+    cached = _pos_cache_get("*")
+    if cached is not None:
+        return cached
     position_service = PositionService(db)
     positions = position_service.get_all_positions()
     
-    # Update all positions with latest prices
-    for pos in positions:
-        try:
-            bc = get_broadcaster(pos.symbol)
-            if bc.latest_price and isinstance(bc.latest_price, dict):
-                latest = bc.latest_price.get("price")
-            elif isinstance(bc.latest_price, (int, float)):
-                latest = bc.latest_price
-            else:
-                latest = None
-            
-            if latest:
-                position_service.update_position_price(pos.symbol, latest)
-        except Exception:
-            pass
+    # Update all positions with latest prices (one broadcaster lookup per symbol)
+    position_service.update_positions_prices(
+        {s: _latest_price(s) for s in {p.symbol for p in positions}}
+    )
     
-    # Refresh positions after price updates
-    positions = position_service.get_all_positions()
-    return [position_service.to_dict(pos) for pos in positions]
+    result = [position_service.to_dict(pos) for pos in positions]
+    _pos_cache["*"] = (time.time(), result)
+    return result
 
 # ----------------------
 # Multi-Exchange APIs
@@ -630,7 +838,8 @@ async def multi_exchange_websocket(websocket: WebSocket, symbol: str):
                 queue = await multi_exchange_feed.subscribe(exchange_type, symbol)
                 queues[exchange_type] = queue
             except Exception as e:
-                print(f"Failed to subscribe to {exchange_type}: {e}")
+                _count_ws_error('subscribe')
+                logger.warning("Failed to subscribe to %s: %s", exchange_type, e)
         
         # 메시지 브로드캐스트
         while True:
@@ -638,11 +847,12 @@ async def multi_exchange_websocket(websocket: WebSocket, symbol: str):
                 try:
                     # 비동기적으로 큐에서 메시지 가져오기
                     message = await asyncio.wait_for(queue.get(), timeout=0.1)
-                    await websocket.send_json(message)
+                    await websocket.send_text(_ws_text(message))
                 except asyncio.TimeoutError:
                     continue
                 except Exception as e:
-                    print(f"Error processing {exchange_type} message: {e}")
+                    _count_ws_error('send')
+                    logger.warning("Error processing %s message: %s", exchange_type, e)
             
             await asyncio.sleep(0.01)  # CPU 사용량 조절
             
@@ -654,7 +864,8 @@ async def multi_exchange_websocket(websocket: WebSocket, symbol: str):
             try:
                 await multi_exchange_feed.unsubscribe(exchange_type, symbol, queue)
             except Exception as e:
-                print(f"Error unsubscribing from {exchange_type}: {e}")
+                _count_ws_error('unsubscribe')
+                logger.warning("Error unsubscribing from %s: %s", exchange_type, e)
 
 # ----------------------
 # Real Trading APIs
@@ -716,7 +927,7 @@ def configure_exchange(exchange_type: str, config: ExchangeConfigRequest):
             max_leverage=config.max_leverage
         )
         
-        trading_config.exchanges[exchange_type] = exchange_config
+        trading_manager.set_exchange_config(exchange_config)
         return {"status": "ok", "message": f"Exchange {exchange_type} configured"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -726,7 +937,7 @@ def set_trading_mode(mode_request: TradingModeRequest):
     """거래 모드 설정"""
     try:
         mode = TradingMode(mode_request.mode)
-        trading_config.mode = mode
+        trading_manager.set_mode(mode)
         return {"status": "ok", "message": f"Trading mode set to {mode.value}"}
     except ValueError:
         return {"status": "error", "message": "Invalid trading mode"}
@@ -734,7 +945,7 @@ def set_trading_mode(mode_request: TradingModeRequest):
 @app.post("/api/trading/order")
 async def place_real_order(order_request: RealOrderRequest, db: Session = Depends(get_db)):
     """실제 주문 실행"""
-    return await real_trading_service.place_real_order(
+    result = await real_trading_service.place_real_order(
         db=db,
         exchange_type=order_request.exchange_type,
         symbol=order_request.symbol,
@@ -743,6 +954,8 @@ async def place_real_order(order_request: RealOrderRequest, db: Session = Depend
         price=order_request.price,
         order_type=order_request.order_type
     )
+    _invalidate_positions(order_request.symbol)
+    return result
 
 @app.delete("/api/trading/order/{exchange_type}/{symbol}/{order_id}")
 async def cancel_real_order(exchange_type: str, symbol: str, order_id: str):
@@ -857,7 +1070,7 @@ async def get_symbol_prices(symbol: str):
 @app.post("/api/symbols/order")
 async def place_multi_symbol_order(order_request: MultiSymbolOrderRequest, db: Session = Depends(get_db)):
     """다중 심볼 주문 실행"""
-    return await multi_symbol_service.place_multi_symbol_order(
+    result = await multi_symbol_service.place_multi_symbol_order(
         db=db,
         symbol=order_request.symbol,
         side=order_request.side,
@@ -865,6 +1078,8 @@ async def place_multi_symbol_order(order_request: MultiSymbolOrderRequest, db: S
         price=order_request.price,
         exchange_type=order_request.exchange_type
     )
+    _invalidate_positions(order_request.symbol)
+    return result
 
 @app.get("/api/symbols/positions")
 async def get_multi_symbol_positions(symbol: str = None, db: Session = Depends(get_db)):
@@ -878,67 +1093,190 @@ async def get_multi_symbol_positions(symbol: str = None, db: Session = Depends(g
 @app.post("/api/symbols/close")
 async def close_symbol_position(close_request: ClosePositionRequest, db: Session = Depends(get_db)):
     """심볼 포지션 청산"""
-    return await multi_symbol_service.close_symbol_position(
+    result = await multi_symbol_service.close_symbol_position(
         db=db,
         symbol=close_request.symbol,
         quantity=close_request.quantity
     )
+    _invalidate_positions(close_request.symbol)
+    return result
+
+# /ws/multi-symbol fan-out: one producer serializes each update once and hands the
+# same frame to every connected client's bounded queue; a per-connection sender task
+# drains it, so a slow client only drops its own oldest frames instead of stalling
+# the others. The producer wakes on price updates instead of polling;
+# _MULTI_SYMBOL_MIN_INTERVAL coalesces bursts of ticks into one push, and a done
+# callback restarts it if it dies while clients are connected.
+# Clients connecting with ?compression=zlib get one zlib-compressed binary frame
+# per update, compressed once for all of them (permessage-deflate is disabled on
+# the server, see __main__ / Dockerfile).
+_multi_symbol_clients: Dict[WebSocket, asyncio.Queue] = {}
+_multi_symbol_zlib_clients: Dict[WebSocket, asyncio.Queue] = {}
+_multi_symbol_task: Optional[asyncio.Task] = None
+_MULTI_SYMBOL_MIN_INTERVAL = 0.1
+_MULTI_SYMBOL_QUEUE_SIZE = 8
+_MULTI_SYMBOL_RESTART_DELAY = 1.0
+BROADCAST_BATCH_SIZE = 50
+
+def _offer(queue: asyncio.Queue, frame):
+    """Enqueue without waiting; a full queue drops its oldest frame."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(frame)
+
+async def _fan_out(queues: List[asyncio.Queue], frame):
+    """Offer frame to every client queue, yielding to the loop between batches
+    so a large fan-out does not hold up HTTP handlers."""
+    for i in range(0, len(queues), BROADCAST_BATCH_SIZE):
+        if i:
+            await asyncio.sleep(0)
+        for queue in queues[i:i + BROADCAST_BATCH_SIZE]:
+            _offer(queue, frame)
+
+async def _multi_symbol_frame() -> Optional[str]:
+    prices = await multi_symbol_service.get_all_symbols_prices()
+    if not prices:
+        return None
+    return _ws_text({
+        "type": "prices",
+        "data": prices,
+        "timestamp": int(time.time() * 1000)
+    })
+
+async def _multi_symbol_producer():
+    while _multi_symbol_clients or _multi_symbol_zlib_clients:
+        await multi_symbol_service.wait_for_price_update()
+        try:
+            payload = await _multi_symbol_frame()
+        except Exception as e:
+            logger.warning("multi-symbol snapshot failed: %s", e)
+            await asyncio.sleep(_MULTI_SYMBOL_RESTART_DELAY)
+            continue
+        if payload:
+            if _multi_symbol_clients:
+                await _fan_out(list(_multi_symbol_clients.values()), payload)
+            if _multi_symbol_zlib_clients:
+                compressed = zlib.compress(payload.encode(), 1)
+                await _fan_out(list(_multi_symbol_zlib_clients.values()), compressed)
+        await asyncio.sleep(_MULTI_SYMBOL_MIN_INTERVAL)
+
+def _on_multi_symbol_producer_done(task: asyncio.Task):
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error("multi-symbol producer crashed: %s", exc)
+        _count_ws_error('producer')
+    if _multi_symbol_clients or _multi_symbol_zlib_clients:
+        # restart after a short delay so a persistent failure does not spin
+        asyncio.get_running_loop().call_later(_MULTI_SYMBOL_RESTART_DELAY, _ensure_multi_symbol_producer)
+
+def _ensure_multi_symbol_producer():
+    global _multi_symbol_task
+    if not (_multi_symbol_clients or _multi_symbol_zlib_clients):
+        return
+    if _multi_symbol_task is None or _multi_symbol_task.done():
+        _multi_symbol_task = asyncio.create_task(_multi_symbol_producer())
+        _multi_symbol_task.add_done_callback(_on_multi_symbol_producer_done)
+
+async def _multi_symbol_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """Drain one client's queue (str -> text frame, bytes -> binary frame)."""
+    while True:
+        frame = await queue.get()
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
 
 @app.websocket("/ws/multi-symbol")
-async def multi_symbol_websocket(websocket: WebSocket):
-    """다중 심볼 WebSocket"""
+async def multi_symbol_websocket(websocket: WebSocket, compression: Optional[str] = None):
+    """다중 심볼 WebSocket (compression=zlib: zlib 압축 바이너리 프레임)"""
     await websocket.accept()
+    compressed = compression == "zlib"
+    clients = _multi_symbol_zlib_clients if compressed else _multi_symbol_clients
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_MULTI_SYMBOL_QUEUE_SIZE)
+    
+    # 접속 직후 현재 시세 스냅샷 (다음 가격 변동까지 기다리지 않도록)
+    try:
+        snapshot = await _multi_symbol_frame()
+        if snapshot:
+            _offer(queue, zlib.compress(snapshot.encode(), 1) if compressed else snapshot)
+    except Exception as e:
+        logger.warning("multi-symbol initial snapshot failed: %s", e)
+    
+    clients[websocket] = queue
+    _ensure_multi_symbol_producer()
+    sender = asyncio.create_task(_multi_symbol_sender(websocket, queue))
+    # 가격 전송은 sender 태스크가 담당, 여기서는 연결 종료만 감지
+    receiver = asyncio.create_task(websocket.receive_text())
     
     try:
-        # 모든 활성 심볼의 가격 스트림
         while True:
-            prices = await multi_symbol_service.get_all_symbols_prices()
-            if prices:
-                await websocket.send_json({
-                    "type": "prices",
-                    "data": prices,
-                    "timestamp": int(time.time() * 1000)
-                })
-            await asyncio.sleep(1)  # 1초마다 업데이트
+            done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if sender in done:
+                # 전송 실패 (연결 끊김 등)
+                exc = sender.exception()
+                if exc is not None:
+                    logger.warning("multi-symbol WS send failed: %s", exc)
+                    _count_ws_error('send')
+                break
+            receiver.result()  # WebSocketDisconnect 는 여기서 발생
+            receiver = asyncio.create_task(websocket.receive_text())
     except WebSocketDisconnect:
         pass
+    finally:
+        clients.pop(websocket, None)
+        sender.cancel()
+        receiver.cancel()
+
+_AI_STATUS_FALLBACK_INTERVAL = 2.0
 
 @app.websocket("/ws/ai-trading")
 async def ai_trading_websocket(websocket: WebSocket):
     """AI 트레이딩 WebSocket"""
     await websocket.accept()
     
-    # AI 트레이딩 엔진에 WebSocket 클라이언트 등록
+    # AI 트레이딩 엔진에 WebSocket 클라이언트 등록 (상태 변경 시 큐로 알림 수신)
     with get_db_session() as db:
-        ai_service = AITradingService(db, real_trading_service)
-        if ai_service.engine:
-            ai_service.engine.add_websocket_client(websocket)
+        engine = get_ai_trading_service(db).engine
+    # 엔진이 없으면 알림 큐가 없으므로 주기적으로 상태를 전송
+    updates = engine.add_websocket_client(websocket) if engine else None
+    first = True
     
     try:
         while True:
+            if updates is not None:
+                item = await updates.get()
+            else:
+                if not first:
+                    await asyncio.sleep(_AI_STATUS_FALLBACK_INTERVAL)
+                item = None
+            first = False
+            if item is not None:
+                # 엔진이 한 번 직렬화해 큐에 넣은 활동(ai_activity) 프레임
+                try:
+                    await websocket.send_text(item)
+                except Exception as ws_error:
+                    print(f"Error sending WebSocket message: {ws_error}")
+                    break
+                continue
             try:
-                # 매번 새로운 세션으로 AI 서비스 생성
-                with get_db_session() as db:
-                    ai_service = AITradingService(db, real_trading_service)
-                    
-                    # AI 상태 업데이트
-                    status = ai_service.get_ai_status()
-                    dashboard_data = ai_service.get_ai_dashboard_data()
+                # AI 상태 업데이트 (TTL 스냅샷: 캐시 미스일 때만 DB 세션 사용)
+                status = _ai_snapshot("get_ai_status")
+                dashboard_data = _ai_snapshot("get_ai_dashboard_data")
                     
                 try:
-                    await websocket.send_json({
+                    await websocket.send_text(_ws_text({
                         "type": "ai_status",
                         "data": {
                             "status": status,
                             "dashboard": dashboard_data,
                             "timestamp": int(time.time() * 1000)
                         }
-                    })
+                    }))
                 except Exception as ws_error:
                     print(f"Error sending WebSocket message: {ws_error}")
                     break  # WebSocket 연결이 끊어진 경우 루프 종료
-                
-                await asyncio.sleep(2)  # 2초마다 업데이트
             except Exception as e:
                 print(f"Error in AI trading WebSocket loop: {e}")
                 await asyncio.sleep(5)  # 오류 시 5초 대기
@@ -948,10 +1286,8 @@ async def ai_trading_websocket(websocket: WebSocket):
         print(f"AI trading WebSocket error: {e}")
     finally:
         # WebSocket 연결이 끊어질 때 클라이언트 제거
-        with get_db_session() as db:
-            ai_service = AITradingService(db, real_trading_service)
-            if ai_service.engine:
-                ai_service.engine.remove_websocket_client(websocket)
+        if engine:
+            engine.remove_websocket_client(websocket)
 
 
 
@@ -963,38 +1299,61 @@ async def ai_trading_websocket(websocket: WebSocket):
 @app.get("/api/ai/status")
 def get_ai_status():
     """AI 트레이딩 상태 조회"""
-    with get_db_session() as db:
-        ai_service = AITradingService(db, real_trading_service)
-        return ai_service.get_ai_status()
+    return _ai_snapshot("get_ai_status")
 
 @app.get("/api/ai/strategies")
 def get_ai_strategies():
     """AI 트레이딩 전략 목록 조회"""
     with get_db_session() as db:
-        ai_service = AITradingService(db, real_trading_service)
-        return ai_service.get_strategies()
+        return get_ai_trading_service(db).get_strategies()
 
 class AIStrategyRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     name: str
     risk_level: str
     symbol: str
     exchange_type: str = "binance"
-    timeframe: str = None
-    leverage_min: float = None
-    leverage_max: float = None
+    timeframe: Optional[str] = None
+    leverage_min: Optional[float] = None
+    leverage_max: Optional[float] = None
     position_size_usd: float = 100.0
-    confidence_threshold: float = None
+    confidence_threshold: Optional[float] = None
     max_daily_trades: int = 100
-    stop_loss_pct: float = None
-    take_profit_pct: float = None
-
-@app.post("/api/ai/strategies")
-def create_ai_strategy(strategy_request: AIStrategyRequest):
+    stop_loss_pct: Optional[float] = None
+    take_profit_pct: Optional[float] = None
+
+class AIStrategyUpdateRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    name: Optional[str] = None
+    symbol: Optional[str] = None
+    exchange_type: Optional[str] = None
+    timeframe: Optional[str] = None
+    leverage_min: Optional[float] = None
+    leverage_max: Optional[float] = None
+    position_size_usd: Optional[float] = None
+    confidence_threshold: Optional[float] = None
+    max_daily_trades: Optional[int] = None
+    stop_loss_pct: Optional[float] = None
+    take_profit_pct: Optional[float] = None
+
+@app.post("/api/ai/strategies", openapi_extra={
+    "requestBody": {"required": True, "content": {"application/json": {"schema": AIStrategyRequest.model_json_schema()}}}
+})
+async def create_ai_strategy(request: Request):
     """새로운 AI 트레이딩 전략 생성"""
+    try:
+        strategy_request = AIStrategyRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await run_in_threadpool(_create_ai_strategy, strategy_request)
+
+def _create_ai_strategy(strategy_request: AIStrategyRequest) -> dict:
     try:
         print(f"Received strategy request: {strategy_request}")
         with get_db_session() as db:
-            ai_service = AITradingService(db, real_trading_service)
+            ai_service = get_ai_trading_service(db)
             result = ai_service.create_strategy(
                 name=strategy_request.name,
                 risk_level=strategy_request.risk_level,
@@ -1009,6 +1368,7 @@ def create_ai_strategy(strategy_request: AIStrategyRequest):
                 stop_loss_pct=strategy_request.stop_loss_pct,
                 take_profit_pct=strategy_request.take_profit_pct
             )
+        _ai_changed()
         print(f"Strategy creation result: {result}")
         return result
     except Exception as e:
@@ -1016,48 +1376,58 @@ def create_ai_strategy(strategy_request: AIStrategyRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/ai/strategies/{config_id}")
-def update_ai_strategy(config_id: int, **kwargs):
-    """AI 트레이딩 전략 설정 업데이트"""
-    ai_service = get_ai_trading_service()
-    return ai_service.update_strategy(config_id, **kwargs)
+def update_ai_strategy(config_id: int, update_request: AIStrategyUpdateRequest):
+    """AI 트레이딩 전략 설정 업데이트 (요청에 포함된 필드만 변경)"""
+    with get_db_session() as db:
+        result = get_ai_trading_service(db).update_strategy(
+            config_id, **update_request.model_dump(exclude_unset=True)
+        )
+    _ai_changed()
+    return result
 
 @app.delete("/api/ai/strategies/{config_id}")
 def delete_ai_strategy(config_id: int):
     """AI 트레이딩 전략 삭제"""
-    ai_service = get_ai_trading_service()
-    return ai_service.delete_strategy(config_id)
+    with get_db_session() as db:
+        result = get_ai_trading_service(db).delete_strategy(config_id)
+    _ai_changed()
+    return result
 
 @app.post("/api/ai/strategies/{config_id}/toggle")
 def toggle_ai_strategy(config_id: int):
     """AI 트레이딩 전략 활성화/비활성화"""
-    ai_service = get_ai_trading_service()
-    return ai_service.toggle_strategy(config_id)
+    with get_db_session() as db:
+        result = get_ai_trading_service(db).toggle_strategy(config_id)
+    _ai_changed()
+    return result
 
 @app.get("/api/ai/strategies/{config_id}/logs")
 def get_ai_strategy_logs(config_id: int, limit: int = 100):
     """AI 트레이딩 전략 로그 조회"""
-    ai_service = get_ai_trading_service()
-    return ai_service.get_strategy_logs(config_id, limit)
+    with get_db_session() as db:
+        return get_ai_trading_service(db).get_strategy_logs(config_id, limit)
 
 @app.get("/api/ai/strategies/{config_id}/performance")
 def get_ai_strategy_performance(config_id: int, period_type: str = "DAILY"):
     """AI 트레이딩 전략 성과 분석 조회"""
-    ai_service = get_ai_trading_service()
-    return ai_service.get_performance_analysis(config_id, period_type)
+    with get_db_session() as db:
+        return get_ai_trading_service(db).get_performance_analysis(config_id, period_type)
 
 @app.post("/api/ai/strategies/{config_id}/reset")
 def reset_ai_strategy_performance(config_id: int):
     """AI 트레이딩 전략 성과 리셋"""
-    ai_service = get_ai_trading_service()
-    return ai_service.reset_strategy_performance(config_id)
+    with get_db_session() as db:
+        result = get_ai_trading_service(db).reset_strategy_performance(config_id)
+    _ai_changed()
+    return result
 
 @app.post("/api/ai/start")
 async def start_ai_trading():
     """AI 트레이딩 시작"""
     try:
         with get_db_session() as db:
-            ai_service = AITradingService(db, real_trading_service)
-            result = await ai_service.start_ai_trading()
+            result = await get_ai_trading_service(db).start_ai_trading()
+        _ai_changed()
         return result
     except Exception as e:
         print(f"Error starting AI trading: {e}")
@@ -1068,8 +1438,8 @@ async def stop_ai_trading():
     """AI 트레이딩 중지"""
     try:
         with get_db_session() as db:
-            ai_service = AITradingService(db, real_trading_service)
-            result = await ai_service.stop_ai_trading()
+            result = await get_ai_trading_service(db).stop_ai_trading()
+        _ai_changed()
         return result
     except Exception as e:
         print(f"Error stopping AI trading: {e}")
@@ -1078,10 +1448,8 @@ async def stop_ai_trading():
 @app.get("/api/ai/dashboard")
 def get_ai_dashboard():
     """AI 트레이딩 대시보드 데이터 조회"""
-    with get_db_session() as db:
-        ai_service = AITradingService(db, real_trading_service)
-        return ai_service.get_ai_dashboard_data()
+    return _ai_snapshot("get_ai_dashboard_data")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    uvicorn.run(app, host="0.0.0.0", port=8001, ws_per_message_deflate=False)
@@ -1,32 +1,47 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, Date, ForeignKey, Index, JSON, Numeric, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+# 금액/수량 컬럼: DB에는 고정소수점으로 저장, 파이썬에서는 float로 읽어 기존 연산 유지
+Money = Numeric(18, 8, asdecimal=False)
+
+# 시각 컬럼: 파이썬 쪽 기본값과 DB 기본값을 함께 지정
+# (create_all 은 기존 테이블을 바꾸지 않으므로, 예전 DB 에는 컬럼 DEFAULT 가 없을 수 있음)
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        Index('ix_trade_timestamp', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String, nullable=False)     # BTCUSDT
     side = Column(String, nullable=False)       # BUY / SELL
-    price = Column(Float, nullable=False)       # 체결 가격
-    qty = Column(Float, nullable=False)         # 수량
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    pnl = Column(Float, default=0.0)            # 손익
+    price = Column(Money, nullable=False)       # 체결 가격
+    qty = Column(Money, nullable=False)         # 수량
+    timestamp = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    pnl = Column(Money, default=0.0)            # 손익
 
 class Position(Base):
     __tablename__ = "positions"
+    __table_args__ = (
+        Index('ix_position_active_qty', 'is_active', 'qty'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String, nullable=False, unique=True)  # BTCUSDT
     side = Column(String, nullable=True)        # BUY / SELL / None
-    qty = Column(Float, default=0.0)            # 수량
-    entry_price = Column(Float, default=0.0)    # 평단가
-    unrealized_pnl = Column(Float, default=0.0) # 미실현손익
-    latest_price = Column(Float, default=0.0)   # 최신가격
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    qty = Column(Money, default=0.0)            # 수량
+    entry_price = Column(Money, default=0.0)    # 평단가
+    unrealized_pnl = Column(Money, default=0.0) # 미실현손익
+    latest_price = Column(Money, default=0.0)   # 최신가격
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now(), onupdate=func.now())
     is_active = Column(Boolean, default=True)   # 활성 상태
 
 
@@ -44,7 +59,7 @@ class AITradingConfig(Base):
     timeframe = Column(String, nullable=False)  # "1m", "5m", "1h"
     leverage_min = Column(Float, default=1.0)   # 최소 레버리지
     leverage_max = Column(Float, default=50.0)  # 최대 레버리지
-    position_size_usd = Column(Float, default=100.0) # 포지션 크기 (USD)
+    position_size_usd = Column(Money, default=100.0) # 포지션 크기 (USD)
     
     # AI 설정
     ai_model_version = Column(String, default="v1.0")
@@ -56,40 +71,47 @@ class AITradingConfig(Base):
     # 성과 추적
     total_trades = Column(Integer, default=0)
     winning_trades = Column(Integer, default=0)
-    total_pnl = Column(Float, default=0.0)
-    max_drawdown = Column(Float, default=0.0)
+    total_pnl = Column(Money, default=0.0)
+    max_drawdown = Column(Money, default=0.0)
     sharpe_ratio = Column(Float, default=0.0)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now(), onupdate=func.now())
 
 
 class AITradingLog(Base):
     __tablename__ = "ai_trading_logs"
+    __table_args__ = (
+        Index('ix_ai_log_config_time', 'config_id', 'created_at'),
+        Index('ix_ai_log_tech_gin', 'technical_indicators', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     config_id = Column(Integer, ForeignKey("ai_trading_configs.id"), nullable=False)
     action = Column(String, nullable=False)     # "ENTRY", "EXIT", "ANALYSIS", "UPGRADE"
     symbol = Column(String, nullable=False)
     side = Column(String, nullable=True)        # BUY, SELL
-    quantity = Column(Float, nullable=True)
-    price = Column(Float, nullable=True)
-    pnl = Column(Float, default=0.0)
+    quantity = Column(Money, nullable=True)
+    price = Column(Money, nullable=True)
+    pnl = Column(Money, default=0.0)
     
     # AI 분석 결과
     confidence_score = Column(Float, nullable=True)
-    technical_indicators = Column(Text, nullable=True) # JSON string
+    technical_indicators = Column(JSON().with_variant(JSONB, 'postgresql'), nullable=True) # PostgreSQL은 JSONB
     market_sentiment = Column(String, nullable=True)
     risk_assessment = Column(String, nullable=True)
     
     # 메타데이터
     reason = Column(Text, nullable=True)        # 거래 이유
     notes = Column(Text, nullable=True)         # 추가 노트
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
 
 
 class AITradingPerformance(Base):
     __tablename__ = "ai_trading_performance"
+    __table_args__ = (
+        Index('ix_ai_perf_config_period', 'config_id', 'period_type', 'period_date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     config_id = Column(Integer, ForeignKey("ai_trading_configs.id"), nullable=False)
@@ -101,9 +123,9 @@ class AITradingPerformance(Base):
     winning_trades = Column(Integer, default=0)
     losing_trades = Column(Integer, default=0)
     win_rate = Column(Float, default=0.0)        # 승률
-    total_pnl = Column(Float, default=0.0)       # 총 손익
-    avg_pnl_per_trade = Column(Float, default=0.0) # 거래당 평균 손익
-    max_drawdown = Column(Float, default=0.0)    # 최대 손실
+    total_pnl = Column(Money, default=0.0)       # 총 손익
+    avg_pnl_per_trade = Column(Money, default=0.0) # 거래당 평균 손익
+    max_drawdown = Column(Money, default=0.0)    # 최대 손실
     sharpe_ratio = Column(Float, default=0.0)    # 샤프 비율
     profit_factor = Column(Float, default=0.0)   # 수익 팩터
     
@@ -112,5 +134,5 @@ class AITradingPerformance(Base):
     prediction_accuracy = Column(Float, default=0.0) # 예측 정확도
     risk_adjusted_return = Column(Float, default=0.0) # 위험 조정 수익률
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now(), onupdate=func.now())
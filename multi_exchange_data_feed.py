@@ -1,8 +1,10 @@
 import asyncio
 import json
+import numpy as np
+import time
 import websockets
 from typing import Dict, List, Optional, Callable
-from datetime import datetime
+from datetime import datetime, timezone
 from exchange_factory import ExchangeFactory
 from exchange_interface import ExchangeType
 
@@ -13,15 +15,36 @@ class MultiExchangeDataFeed:
         self.exchanges: Dict[str, any] = {}
         self.websocket_connections: Dict[str, websockets.WebSocketServerProtocol] = {}
         self.subscribers: Dict[str, List[asyncio.Queue]] = {}
-        self.latest_prices: Dict[str, Dict[str, float]] = {}  # {exchange: {symbol: price}}
+        # 최신 가격: (거래소, 심볼) 2차원 배열 + 이름→인덱스 맵, 미수신은 NaN
+        self._exchange_ids: Dict[str, int] = {}
+        self._symbol_ids: Dict[str, int] = {}
+        self._prices = np.full((0, 0), np.nan)
+        self._dirty = np.zeros(0, dtype=np.uint8)  # 심볼별 마지막 pop_dirty() 이후 변경 여부
         self.running = False
+        self.price_updated = asyncio.Event()  # 가격 갱신 시 set, 소비자가 clear
     
     def add_exchange(self, exchange_type: str, api_key: str = None, 
                     api_secret: str = None, testnet: bool = True):
         """거래소 추가"""
         exchange = ExchangeFactory.get_exchange(exchange_type, api_key, api_secret, testnet)
         self.exchanges[exchange_type] = exchange
-        self.latest_prices[exchange_type] = {}
+        ei = self._exchange_id(exchange_type)
+        self._prices[ei] = np.nan
+    
+    def _exchange_id(self, exchange_type: str) -> int:
+        ei = self._exchange_ids.get(exchange_type)
+        if ei is None:
+            ei = self._exchange_ids[exchange_type] = len(self._exchange_ids)
+            self._prices = np.pad(self._prices, ((0, 1), (0, 0)), constant_values=np.nan)
+        return ei
+    
+    def _symbol_id(self, symbol: str) -> int:
+        si = self._symbol_ids.get(symbol)
+        if si is None:
+            si = self._symbol_ids[symbol] = len(self._symbol_ids)
+            self._prices = np.pad(self._prices, ((0, 0), (0, 1)), constant_values=np.nan)
+            self._dirty = np.append(self._dirty, np.uint8(0))
+        return si
     
     async def start_websocket(self, exchange_type: str, symbol: str):
         """WebSocket 시작"""
@@ -30,18 +53,25 @@ class MultiExchangeDataFeed:
         
         exchange = self.exchanges[exchange_type]
         ws_url = exchange.get_websocket_url(symbol)
+        ei = self._exchange_id(exchange_type)
+        si = self._symbol_id(symbol)
         
         try:
-            async with websockets.connect(ws_url) as websocket:
+            # 거래소 스트림은 작은 JSON 프레임이라 permessage-deflate 협상/해제 비용만 추가됨
+            async with websockets.connect(ws_url, compression=None) as websocket:
                 self.websocket_connections[f"{exchange_type}_{symbol}"] = websocket
-                print(f"[{datetime.utcnow()}] Connected to {exchange_type} WebSocket for {symbol}")
+                print(f"[{datetime.now(timezone.utc)}] Connected to {exchange_type} WebSocket for {symbol}")
                 
                 async for message in websocket:
                     try:
                         data = exchange.parse_websocket_message(message)
                         if data and data.get("price"):
-                            # 가격 업데이트
-                            self.latest_prices[exchange_type][symbol] = data["price"]
+                            # 가격 업데이트 (값이 바뀐 경우에만 변경 표시)
+                            price = data["price"]
+                            if self._prices[ei, si] != price:
+                                self._prices[ei, si] = price
+                                self._dirty[si] = 1
+                                self.price_updated.set()
                             
                             # 구독자들에게 브로드캐스트
                             await self._broadcast_price(exchange_type, symbol, data)
@@ -55,20 +85,24 @@ class MultiExchangeDataFeed:
     
     async def _broadcast_price(self, exchange_type: str, symbol: str, data: dict):
         """가격 브로드캐스트"""
-        key = f"{exchange_type}_{symbol}"
-        if key in self.subscribers:
-            for queue in self.subscribers[key]:
-                try:
-                    await queue.put({
-                        "exchange": exchange_type,
-                        "symbol": symbol,
-                        "price": data["price"],
-                        "quantity": data.get("quantity", 0),
-                        "side": data.get("side", "unknown"),
-                        "timestamp": data.get("timestamp", int(datetime.now().timestamp() * 1000))
-                    })
-                except asyncio.QueueFull:
-                    pass
+        queues = self.subscribers.get(f"{exchange_type}_{symbol}")
+        if not queues:
+            return
+        # 페이로드는 한 번만 생성해 모든 구독자가 공유 (구독자는 읽기만 함)
+        payload = {
+            "exchange": exchange_type,
+            "symbol": symbol,
+            "price": data["price"],
+            "quantity": data.get("quantity", 0),
+            "side": data.get("side", "unknown"),
+            "timestamp": data.get("timestamp") or int(time.time() * 1000)
+        }
+        # put_nowait: 느린 구독자가 다른 구독자의 전달을 막지 않도록 await 없이 분배
+        for queue in list(queues):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                pass
     
     async def subscribe(self, exchange_type: str, symbol: str) -> asyncio.Queue:
         """가격 구독"""
@@ -93,16 +127,34 @@ class MultiExchangeDataFeed:
     
     def get_latest_price(self, exchange_type: str, symbol: str) -> Optional[float]:
         """최신 가격 조회"""
-        return self.latest_prices.get(exchange_type, {}).get(symbol)
+        ei = self._exchange_ids.get(exchange_type)
+        si = self._symbol_ids.get(symbol)
+        if ei is None or si is None:
+            return None
+        price = self._prices[ei, si]
+        return None if np.isnan(price) else float(price)
     
     def get_all_prices(self, symbol: str) -> Dict[str, float]:
         """모든 거래소의 가격 조회"""
-        prices = {}
-        for exchange_type in self.latest_prices:
-            price = self.latest_prices[exchange_type].get(symbol)
-            if price:
-                prices[exchange_type] = price
-        return prices
+        si = self._symbol_ids.get(symbol)
+        if si is None:
+            return {}
+        column = self._prices[:, si].tolist()
+        # NaN(미수신)과 0은 제외
+        return {
+            exchange_type: column[ei]
+            for exchange_type, ei in self._exchange_ids.items()
+            if column[ei] == column[ei] and column[ei]
+        }
+    
+    def pop_dirty(self) -> List[str]:
+        """마지막 호출 이후 가격이 바뀐 심볼 목록 (변경 표시 초기화)"""
+        changed = np.flatnonzero(self._dirty)
+        if not changed.size:
+            return []
+        self._dirty[changed] = 0
+        names = list(self._symbol_ids)
+        return [names[i] for i in changed]
     
     async def get_ticker(self, exchange_type: str, symbol: str) -> dict:
         """현재 가격 조회 (REST API)"""
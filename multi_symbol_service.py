@@ -1,26 +1,42 @@
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Any, Tuple
 from sqlalchemy.orm import Session
-from position_service import PositionService
+from position_service import PositionService, realized_pnl, mark_prices
 from trade_service import save_trade
+from database import transaction
 from multi_exchange_data_feed import multi_exchange_feed
 import asyncio
+import sys
 from datetime import datetime
 
+# 입력 심볼 문자열 -> 대문자로 정규화된 intern 문자열 (심볼 종류가 적어 상한만 둠)
+_SYMBOL_INTERN: Dict[str, str] = {}
+_SYMBOL_INTERN_MAX = 1024
+
 class MultiSymbolService:
     """다중 심볼 거래 서비스"""
     
+    @staticmethod
+    def _norm(symbol: str) -> str:
+        """심볼 정규화 (대문자 + intern, 같은 입력은 캐시된 문자열 재사용)"""
+        norm = _SYMBOL_INTERN.get(symbol)
+        if norm is None:
+            norm = sys.intern(symbol.upper())
+            if len(_SYMBOL_INTERN) < _SYMBOL_INTERN_MAX:
+                _SYMBOL_INTERN[symbol] = norm
+        return norm
+    
     def __init__(self):
         self.active_symbols: Set[str] = set()
         self.symbol_exchanges: Dict[str, List[str]] = {}  # {symbol: [exchanges]}
         self.symbol_websockets: Dict[str, Dict[str, asyncio.Queue]] = {}  # {symbol: {exchange: queue}}
-        self.running = False
+        self._consumers: Dict[Tuple[str, str], asyncio.Task] = {}  # {(symbol, exchange): 소비 태스크}
     
     async def add_symbol(self, symbol: str, exchanges: List[str] = None) -> bool:
         """심볼 추가"""
         if exchanges is None:
             exchanges = ["binance", "bybit"]  # 기본 거래소
         
-        symbol = symbol.upper()
+        symbol = self._norm(symbol)
         self.active_symbols.add(symbol)
         self.symbol_exchanges[symbol] = exchanges
         self.symbol_websockets[symbol] = {}
@@ -30,6 +46,9 @@ class MultiSymbolService:
             try:
                 queue = await multi_exchange_feed.subscribe(exchange, symbol)
                 self.symbol_websockets[symbol][exchange] = queue
+                self._consumers[(symbol, exchange)] = asyncio.create_task(
+                    self._consume(symbol, exchange, queue)
+                )
             except Exception as e:
                 print(f"Failed to subscribe {symbol} on {exchange}: {e}")
         
@@ -37,13 +56,16 @@ class MultiSymbolService:
     
     async def remove_symbol(self, symbol: str) -> bool:
         """심볼 제거"""
-        symbol = symbol.upper()
+        symbol = self._norm(symbol)
         if symbol not in self.active_symbols:
             return False
         
         # WebSocket 구독 해제
         if symbol in self.symbol_websockets:
             for exchange, queue in self.symbol_websockets[symbol].items():
+                task = self._consumers.pop((symbol, exchange), None)
+                if task:
+                    task.cancel()
                 try:
                     await multi_exchange_feed.unsubscribe(exchange, symbol, queue)
                 except Exception as e:
@@ -62,11 +84,11 @@ class MultiSymbolService:
     
     def get_symbol_exchanges(self, symbol: str) -> List[str]:
         """심볼의 거래소 목록 조회"""
-        return self.symbol_exchanges.get(symbol.upper(), [])
+        return self.symbol_exchanges.get(self._norm(symbol), [])
     
     async def get_symbol_prices(self, symbol: str) -> Dict[str, float]:
         """심볼의 모든 거래소 가격 조회"""
-        return multi_exchange_feed.get_all_prices(symbol.upper())
+        return multi_exchange_feed.get_all_prices(self._norm(symbol))
     
     async def get_all_symbols_prices(self) -> Dict[str, Dict[str, float]]:
         """모든 심볼의 가격 조회"""
@@ -77,11 +99,19 @@ class MultiSymbolService:
                 all_prices[symbol] = prices
         return all_prices
     
+    async def wait_for_price_update(self):
+        """활성 심볼 중 하나의 가격이 바뀔 때까지 대기"""
+        while True:
+            await multi_exchange_feed.price_updated.wait()
+            multi_exchange_feed.price_updated.clear()
+            if not self.active_symbols.isdisjoint(multi_exchange_feed.pop_dirty()):
+                return
+    
     async def place_multi_symbol_order(self, db: Session, symbol: str, side: str, 
                                      quantity: float, price: float, 
                                      exchange_type: str = None) -> Dict[str, any]:
         """다중 심볼 주문 실행"""
-        symbol = symbol.upper()
+        symbol = self._norm(symbol)
         
         if symbol not in self.active_symbols:
             return {"status": "error", "message": f"Symbol {symbol} not active"}
@@ -97,12 +127,11 @@ class MultiSymbolService:
                 return {"status": "error", "message": f"No exchanges available for {symbol}"}
             exchange_type = available_exchanges[0]
         
-        # 포지션 업데이트
+        # 포지션 업데이트 + 거래 기록 저장 (단일 트랜잭션)
         position_service = PositionService(db)
-        pnl = self._update_position_on_trade(position_service, symbol, side, price, quantity)
-        
-        # 거래 기록 저장
-        trade = save_trade(db, symbol, side, price, quantity, pnl=pnl)
+        with transaction(db):
+            pnl = self._update_position_on_trade(position_service, symbol, side, price, quantity)
+            trade = save_trade(db, symbol, side, price, quantity, pnl=pnl)
         
         return {
             "status": "ok",
@@ -119,48 +148,33 @@ class MultiSymbolService:
                                 symbol: str, side: str, price: float, 
                                 quantity: float) -> float:
         """거래로 인한 포지션 업데이트"""
-        position = position_service.get_position(symbol)
-        realized_pnl = 0.0
+        position = position_service.get_position_for_update(symbol)
         
         if not position or position.qty == 0 or position.side is None:
             # 새 포지션 생성
-            position_service.create_or_update_position(symbol, side, quantity, price, price)
+            position_service.create_or_update_position(symbol, side, quantity, price, price, position=position)
             return 0.0
         
         if side == position.side:
             # 포지션 증가
             new_qty = position.qty + quantity
             new_entry_price = (position.entry_price * position.qty + price * quantity) / new_qty
-            position_service.create_or_update_position(symbol, side, new_qty, new_entry_price, price)
+            position_service.create_or_update_position(symbol, side, new_qty, new_entry_price, price, position=position)
             return 0.0
+        
+        # 포지션 감소 또는 반전: 기존 수량까지만 청산 손익 발생
+        pnl = realized_pnl(position.side, position.entry_price, price, min(quantity, position.qty))
+        remaining = position.qty - quantity
+        if remaining > 0:
+            # 부분 청산
+            position_service.create_or_update_position(symbol, position.side, remaining, position.entry_price, price, position=position)
+        elif remaining == 0:
+            # 전체 청산
+            position_service.close_position(symbol, quantity, position=position)
         else:
-            # 포지션 감소 또는 반전
-            if quantity < position.qty:
-                # 부분 청산
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * quantity
-                else:
-                    realized_pnl = (position.entry_price - price) * quantity
-                new_qty = position.qty - quantity
-                position_service.create_or_update_position(symbol, position.side, new_qty, position.entry_price, price)
-            elif quantity == position.qty:
-                # 전체 청산
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * quantity
-                else:
-                    realized_pnl = (position.entry_price - price) * quantity
-                position_service.close_position(symbol, quantity)
-            else:
-                # 포지션 반전
-                close_qty = position.qty
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * close_qty
-                else:
-                    realized_pnl = (position.entry_price - price) * close_qty
-                remaining = quantity - close_qty
-                position_service.create_or_update_position(symbol, side, remaining, price, price)
-        
-        return realized_pnl
+            # 포지션 반전
+            position_service.create_or_update_position(symbol, side, -remaining, price, price, position=position)
+        return pnl
     
     async def get_symbol_positions(self, db: Session, symbol: str = None) -> Dict[str, any]:
         """심볼별 포지션 조회"""
@@ -168,79 +182,65 @@ class MultiSymbolService:
         
         if symbol:
             # 특정 심볼
-            symbol = symbol.upper()
-            position = position_service.get_position(symbol)
+            symbol = self._norm(symbol)
+            position = position_service.get_position_row(symbol)
             return {symbol: position_service.to_dict(position)}
         else:
-            # 모든 활성 심볼
-            positions = {}
-            for symbol in self.active_symbols:
-                position = position_service.get_position(symbol)
-                positions[symbol] = position_service.to_dict(position)
-            return positions
+            # 모든 활성 심볼 (단일 IN 쿼리)
+            symbols = list(self.active_symbols)
+            positions = position_service.get_position_rows(symbols)
+            return {s: position_service.to_dict(positions.get(s)) for s in symbols}
     
     async def close_symbol_position(self, db: Session, symbol: str, 
                                   quantity: float = None) -> Dict[str, any]:
         """심볼 포지션 청산"""
-        symbol = symbol.upper()
+        symbol = self._norm(symbol)
         position_service = PositionService(db)
-        position = position_service.get_position(symbol)
         
-        if not position or position.qty <= 0:
+        # 잠금 없이 먼저 검증
+        snapshot = position_service.get_position_row(symbol)
+        if not snapshot or snapshot.qty <= 0:
             return {"status": "error", "message": f"No active position for {symbol}"}
         
-        # 청산 수량 결정
-        close_qty = quantity if quantity else position.qty
-        
-        # 실현 손익 계산
-        if position.side == 'BUY':
-            realized_pnl = (position.latest_price - position.entry_price) * close_qty
-        else:
-            realized_pnl = (position.entry_price - position.latest_price) * close_qty
-        
-        # 포지션 청산
-        position_service.close_position(symbol, close_qty)
-        
-        # 청산 거래 기록
-        close_side = 'SELL' if position.side == 'BUY' else 'BUY'
-        trade = save_trade(db, symbol, close_side, position.latest_price, close_qty, pnl=realized_pnl)
+        # 포지션 청산 + 청산 거래 기록 (단일 트랜잭션)
+        with transaction(db):
+            # 행 잠금 후 재확인 (그 사이 다른 체결로 청산됐을 수 있음)
+            position = position_service.get_position_for_update(symbol)
+            if not position or position.qty <= 0:
+                return {"status": "error", "message": f"No active position for {symbol}"}
+            
+            # 청산 수량 결정 (청산 전 방향 보관: close_position이 같은 객체를 갱신함)
+            close_qty = quantity if quantity else position.qty
+            position_side = position.side
+            
+            # 실현 손익 계산
+            pnl = realized_pnl(position_side, position.entry_price, position.latest_price, close_qty)
+            
+            close_side = 'SELL' if position_side == 'BUY' else 'BUY'
+            position_service.close_position(symbol, close_qty, position=position)
+            trade = save_trade(db, symbol, close_side, position.latest_price, close_qty, pnl=pnl)
         
         return {
             "status": "ok",
             "trade_id": trade.id,
             "symbol": symbol,
             "closed_qty": close_qty,
-            "realized_pnl": realized_pnl,
+            "realized_pnl": pnl,
             "price": position.latest_price
         }
     
-    async def start_price_monitoring(self):
-        """가격 모니터링 시작"""
-        self.running = True
-        while self.running:
+    async def _consume(self, symbol: str, exchange: str, queue: asyncio.Queue):
+        """(심볼, 거래소) 가격 큐 소비 태스크"""
+        while True:
+            message = await queue.get()
             try:
-                # 모든 활성 심볼의 가격 업데이트
-                for symbol in self.active_symbols:
-                    if symbol in self.symbol_websockets:
-                        for exchange, queue in self.symbol_websockets[symbol].items():
-                            try:
-                                # 비동기적으로 큐에서 메시지 가져오기
-                                message = await asyncio.wait_for(queue.get(), timeout=0.1)
-                                # 여기서 가격 업데이트 처리
-                                # 예: 포지션의 미실현손익 업데이트 등
-                            except asyncio.TimeoutError:
-                                continue
-                            except Exception as e:
-                                print(f"Error processing {symbol} price from {exchange}: {e}")
-                
-                await asyncio.sleep(0.1)  # CPU 사용량 조절
+                self._on_price(symbol, exchange, message)
             except Exception as e:
-                print(f"Error in price monitoring: {e}")
-                await asyncio.sleep(1)
+                print(f"Error processing {symbol} price from {exchange}: {e}")
     
-    def stop_price_monitoring(self):
-        """가격 모니터링 중지"""
-        self.running = False
+    def _on_price(self, symbol: str, exchange: str, message: dict):
+        """가격 수신 처리: 보유 포지션의 최신가/미실현손익 갱신 (메모리, 저장은 일괄 flush)"""
+        mark_prices({symbol: message["price"]})
 
 # 전역 인스턴스
 multi_symbol_service = MultiSymbolService()
@@ -1,12 +1,245 @@
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from models import Position
-from datetime import datetime
-from typing import Optional, Dict, Any
+import threading
+import numpy as np
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+def realized_pnl(position_side: str, entry_price: float, price: float, qty: float) -> float:
+    """청산 수량에 대한 실현손익 (BUY 포지션 +1, SELL 포지션 -1 방향 계수)"""
+    return (1.0 if position_side == 'BUY' else -1.0) * (price - entry_price) * qty
+
+class _MarkBook:
+    """활성 포지션 시세 캐시 (SoA: 컬럼별 NumPy 배열 + 심볼 -> 행 인덱스)
+
+    틱마다의 가격 반영은 메모리에서 벡터 연산으로 처리하고, 변경된 행은 flush_marks()가 일괄 저장.
+    이벤트 루프(mark), 스레드풀 엔드포인트(remember/forget), flush 스레드(take_dirty)가 함께 쓰므로
+    모든 메서드는 하나의 잠금 안에서 실행. 행마다 세대 번호를 두어 remember/forget 이후의
+    오래된 스냅샷이 저장되지 않게 함
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.gen = np.zeros(capacity, dtype=np.int64)  # remember 시점의 세대 번호
+        self.entry = np.zeros(capacity)
+        self.qty = np.zeros(capacity)
+        self.sign = np.zeros(capacity)  # BUY +1, SELL -1, 방향 없음 0
+        self.latest = np.zeros(capacity)
+        self.unrealized = np.zeros(capacity)
+        # 응답용으로 미리 반올림한 값 (소수점 2자리)
+        self.latest_r = np.zeros(capacity)
+        self.unrealized_r = np.zeros(capacity)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+    _COLUMNS = ('ids', 'gen', 'entry', 'qty', 'sign', 'latest', 'unrealized', 'latest_r', 'unrealized_r', 'dirty')
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def clear(self):
+        with self._lock:
+            self.index.clear()
+            self.symbols.clear()
+            self.dirty[:] = False
+
+    def remember(self, position: Position, latest_price: float = None, unrealized_pnl: float = None):
+        with self._lock:
+            i = self.index.get(position.symbol)
+            if i is None:
+                i = len(self.symbols)
+                if i == len(self.ids):
+                    for name in self._COLUMNS:
+                        column = getattr(self, name)
+                        setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+                self.index[position.symbol] = i
+                self.symbols.append(position.symbol)
+            self._generation += 1
+            self.gen[i] = self._generation
+            # 방금 DB에 쓴 값과 같으므로 저장 대기 상태는 해제
+            self.dirty[i] = False
+            self.ids[i] = position.id
+            self.entry[i] = position.entry_price or 0.0
+            self.qty[i] = position.qty or 0.0
+            self.sign[i] = 1.0 if position.side == 'BUY' else (-1.0 if position.side == 'SELL' else 0.0)
+            self.latest[i] = (position.latest_price or 0.0) if latest_price is None else latest_price
+            self.unrealized[i] = (position.unrealized_pnl or 0.0) if unrealized_pnl is None else unrealized_pnl
+            self.latest_r[i] = round(self.latest[i], 2)
+            self.unrealized_r[i] = round(self.unrealized[i], 2)
+
+    def forget(self, symbol: str):
+        with self._lock:
+            i = self.index.pop(symbol, None)
+            if i is None:
+                return
+            last = len(self.symbols) - 1
+            if i != last:
+                # 마지막 행을 빈 자리로 옮겨 배열을 빈틈없이 유지
+                moved = self.symbols[last]
+                for name in self._COLUMNS:
+                    column = getattr(self, name)
+                    column[i] = column[last]
+                self.symbols[i] = moved
+                self.index[moved] = i
+            self.symbols.pop()
+            self.dirty[last] = False
+
+    def mark(self, prices: Dict[str, float]) -> List[str]:
+        """캐시된 심볼의 최신가 반영 후 미실현손익 일괄 재계산. 캐시에 없는 심볼 목록 반환"""
+        with self._lock:
+            rows, values, missing = [], [], []
+            for symbol, price in prices.items():
+                i = self.index.get(symbol)
+                if i is None:
+                    missing.append(symbol)
+                else:
+                    rows.append(i)
+                    values.append(price)
+            if rows:
+                idx = np.asarray(rows)
+                latest = np.asarray(values, dtype=float)
+                self.latest[idx] = latest
+                self.unrealized[idx] = self.sign[idx] * (latest - self.entry[idx]) * self.qty[idx]
+                self.latest_r[idx] = np.round(latest, 2)
+                self.unrealized_r[idx] = np.round(self.unrealized[idx], 2)
+                self.dirty[idx] = True
+            return missing
+
+    def get(self, symbol: str):
+        """(id, 최신가, 미실현손익) 또는 None - 값은 응답용으로 반올림된 상태"""
+        with self._lock:
+            i = self.index.get(symbol)
+            if i is None:
+                return None
+            return int(self.ids[i]), float(self.latest_r[i]), float(self.unrealized_r[i])
+
+    def take_dirty(self) -> Tuple[List[Dict[str, Any]], List[Tuple[str, int]]]:
+        """변경된 행을 flush UPDATE 파라미터와 (심볼, 세대) 스탬프로 반환하고 변경 표시 초기화"""
+        with self._lock:
+            n = len(self.symbols)
+            idx = np.flatnonzero(self.dirty[:n])
+            if not idx.size:
+                return [], []
+            self.dirty[idx] = False
+            rows = [
+                {"b_id": id_, "b_latest": latest, "b_unrealized": unrealized}
+                for id_, latest, unrealized in zip(
+                    self.ids[idx].tolist(), self.latest[idx].tolist(), self.unrealized[idx].tolist()
+                )
+            ]
+            stamps = list(zip([self.symbols[i] for i in idx.tolist()], self.gen[idx].tolist()))
+            return rows, stamps
+
+    def _current(self, symbol: str, generation: int) -> Optional[int]:
+        i = self.index.get(symbol)
+        if i is None or self.gen[i] != generation:
+            return None
+        return i
+
+    def is_current(self, stamps: List[Tuple[str, int]]) -> bool:
+        """스냅샷 이후 forget/remember 된 행이 없으면 True"""
+        with self._lock:
+            return all(self._current(symbol, generation) is not None for symbol, generation in stamps)
+
+    def redirty(self, stamps: List[Tuple[str, int]]):
+        """저장하지 못한 스냅샷 중 아직 유효한 행을 다시 저장 대기로 표시"""
+        with self._lock:
+            for symbol, generation in stamps:
+                i = self._current(symbol, generation)
+                if i is not None:
+                    self.dirty[i] = True
+
+_marks = _MarkBook()
+
+# 포지션 id -> (updated_at, created_at ISO, updated_at ISO). updated_at 이 바뀌면 다시 계산
+_iso_cache: Dict[int, Tuple[Any, Optional[str], Optional[str]]] = {}
+
+_EMPTY_POSITION = {
+    "side": None,
+    "qty": 0.0,
+    "entry_price": None,
+    "latest_price": None,
+    "unrealized_pnl": 0.0
+}
+
+def _iso_times(position: Position) -> Tuple[Optional[str], Optional[str]]:
+    """created_at/updated_at ISO 문자열 (포지션이 갱신될 때만 isoformat 호출)"""
+    updated_at = position.updated_at
+    cached = _iso_cache.get(position.id)
+    if cached is None or cached[0] != updated_at:
+        created_at = position.created_at
+        cached = _iso_cache[position.id] = (
+            updated_at,
+            created_at.isoformat() if created_at else None,
+            updated_at.isoformat() if updated_at else None
+        )
+    return cached[1], cached[2]
+
+def preload_marks(db: Session) -> int:
+    """활성 포지션 전체를 한 번의 쿼리로 캐시에 적재"""
+    _marks.clear()
+    for position in db.query(Position).filter(Position.is_active == True).all():
+        _marks.remember(position)
+    return len(_marks)
+
+def mark_price(symbol: str, latest_price: float) -> bool:
+    """캐시된 포지션의 최신가/미실현손익 갱신 (DB 접근 없음). 캐시에 없으면 False"""
+    return not _marks.mark({symbol: latest_price})
+
+def mark_prices(prices: Dict[str, float]) -> List[str]:
+    """여러 심볼의 캐시 시세 갱신. 캐시에 없는 심볼 목록 반환"""
+    return _marks.mark(prices)
+
+# 캐시 시세 저장용 UPDATE (executemany). 이미 비활성화된 포지션은 건드리지 않음
+_FLUSH_MARKS = (
+    update(Position.__table__)
+    .where(Position.__table__.c.id == bindparam("b_id"), Position.__table__.c.is_active == True)
+    .values(latest_price=bindparam("b_latest"), unrealized_pnl=bindparam("b_unrealized"))
+)
+
+def flush_marks(db: Session) -> int:
+    """변경된 시세를 UPDATE 한 번(executemany)으로 저장
+
+    UPDATE 후 커밋 전에 스냅샷 행이 그 사이 청산/재기록(forget/remember)되지 않았는지 확인하고,
+    바뀌었으면 롤백해 오래된 시세가 쓰기 경로의 값을 덮어쓰지 않게 함 (유효한 행은 다음 주기에 재시도)
+    """
+    rows, stamps = _marks.take_dirty()
+    if not rows:
+        return 0
+    try:
+        db.execute(_FLUSH_MARKS, rows)
+        if not _marks.is_current(stamps):
+            db.rollback()
+            _marks.redirty(stamps)
+            return 0
+        db.commit()
+    except Exception:
+        db.rollback()
+        _marks.redirty(stamps)
+        raise
+    return len(rows)
+
+# 읽기 전용 조회 컬럼 (to_dict 에 필요한 값만, ORM 객체 생성 없이 Row 로 반환)
+_ROW_COLUMNS = (
+    Position.id, Position.symbol, Position.side, Position.qty, Position.entry_price,
+    Position.latest_price, Position.unrealized_pnl, Position.created_at, Position.updated_at
+)
 
 class PositionService:
     def __init__(self, db: Session):
         self.db = db
 
+    def track(self, position: Position):
+        """쓰기 후 시세 캐시 동기화 (보유 수량이 없거나 비활성이면 캐시에서 제거)"""
+        if position.is_active is False or not position.qty:
+            _marks.forget(position.symbol)
+        else:
+            _marks.remember(position)
+
     def get_position(self, symbol: str) -> Optional[Position]:
         """심볼에 대한 포지션 조회"""
         return self.db.query(Position).filter(
@@ -14,10 +247,70 @@ class PositionService:
             Position.is_active == True
         ).first()
 
+    def get_position_row(self, symbol: str) -> Optional[Row]:
+        """응답용 포지션 조회 (Row, 수정 불가 - 변경이 필요하면 get_position 사용)"""
+        return self.db.execute(
+            select(*_ROW_COLUMNS).where(
+                Position.symbol == symbol.upper(),
+                Position.is_active == True
+            )
+        ).first()
+
+    def get_position_rows(self, symbols: List[str]) -> Dict[str, Row]:
+        """여러 심볼의 응답용 포지션을 한 번의 쿼리로 조회 ({symbol: Row})"""
+        if not symbols:
+            return {}
+        rows = self.db.execute(
+            select(*_ROW_COLUMNS).where(
+                Position.symbol.in_([s.upper() for s in symbols]),
+                Position.is_active == True
+            )
+        ).all()
+        return {row.symbol: row for row in rows}
+
+    def get_position_for_update(self, symbol: str) -> Optional[Position]:
+        """쓰기 경로용 포지션 조회 (트랜잭션 종료까지 행 잠금)
+
+        PostgreSQL 등은 SELECT ... FOR UPDATE, 행 잠금이 없는 SQLite 는 BEGIN IMMEDIATE 로
+        쓰기 잠금을 먼저 잡아 동시 체결이 같은 포지션을 덮어쓰지 않게 함
+        """
+        # populate_existing 가 세션의 미반영 변경을 덮어쓰지 않도록 먼저 flush
+        self.db.flush()
+        if self.db.get_bind().dialect.name == "sqlite":
+            self._begin_immediate()
+            query = self.db.query(Position)
+        else:
+            query = self.db.query(Position).with_for_update()
+        return query.populate_existing().filter(
+            Position.symbol == symbol.upper(),
+            Position.is_active == True
+        ).first()
+
+    def _begin_immediate(self):
+        """SQLite: 아직 트랜잭션이 없으면 예약(쓰기) 잠금으로 시작"""
+        dbapi_conn = self.db.connection().connection.driver_connection
+        if not dbapi_conn.in_transaction:
+            dbapi_conn.execute("BEGIN IMMEDIATE")
+
+    def get_positions(self, symbols: List[str]) -> Dict[str, Position]:
+        """여러 심볼의 활성 포지션을 한 번의 쿼리로 조회 ({symbol: Position})"""
+        if not symbols:
+            return {}
+        rows = self.db.query(Position).filter(
+            Position.symbol.in_([s.upper() for s in symbols]),
+            Position.is_active == True
+        ).all()
+        return {p.symbol: p for p in rows}
+
     def create_or_update_position(self, symbol: str, side: str, qty: float, 
-                                entry_price: float, latest_price: float = None) -> Position:
-        """포지션 생성 또는 업데이트"""
-        position = self.get_position(symbol)
+                                entry_price: float, latest_price: float = None,
+                                position: Optional[Position] = None) -> Position:
+        """포지션 생성 또는 업데이트 (flush만 수행, 커밋은 호출자 담당)
+
+        이미 조회한 포지션을 position으로 넘기면 재조회하지 않음
+        """
+        if position is None:
+            position = self.get_position(symbol)
         
         if not position:
             # 새 포지션 생성
@@ -37,7 +330,6 @@ class PositionService:
             position.entry_price = entry_price
             if latest_price:
                 position.latest_price = latest_price
-            position.updated_at = datetime.utcnow()
         
         # 미실현손익 계산
         if latest_price and side and qty > 0:
@@ -46,18 +338,28 @@ class PositionService:
             else:  # SELL
                 position.unrealized_pnl = (entry_price - latest_price) * qty
         
-        self.db.commit()
-        self.db.refresh(position)
+        self.db.flush()
+        self.track(position)
         return position
 
-    def update_position_price(self, symbol: str, latest_price: float) -> Optional[Position]:
-        """포지션의 최신 가격 업데이트"""
-        position = self.get_position(symbol)
-        if not position:
-            return None
+    def update_position_price(self, symbol: str, latest_price: float,
+                              position: Optional[Position] = None) -> Optional[Union[Position, Row]]:
+        """포지션의 최신 가격 업데이트. 포지션이 없으면 None
+
+        캐시된 활성 포지션은 메모리에서만 갱신하고(저장은 flush_marks) 전달받은 포지션 또는
+        get_position_row 결과를 반환 (to_dict 가 캐시 시세를 덮어씀). 캐시에 없으면
+        잠금 없이 조회만 하고, 보유 수량이 있을 때만 캐시에 올려 시세 반영 (DB 쓰기 없음)
+        """
+        if mark_price(symbol.upper(), latest_price):
+            return position if position is not None else self.get_position_row(symbol)
+        if position is None:
+            row = self.get_position_row(symbol)
+            if row is not None and row.qty > 0:
+                _marks.remember(row)
+                mark_price(row.symbol, latest_price)
+            return row
         
         position.latest_price = latest_price
-        position.updated_at = datetime.utcnow()
         
         # 미실현손익 재계산
         if position.side and position.qty > 0:
@@ -66,13 +368,37 @@ class PositionService:
             else:  # SELL
                 position.unrealized_pnl = (position.entry_price - latest_price) * position.qty
         
-        self.db.commit()
-        self.db.refresh(position)
+        self.db.flush()
+        self.track(position)
         return position
 
-    def close_position(self, symbol: str, qty: float = None) -> Optional[Position]:
-        """포지션 청산 (부분 또는 전체)"""
-        position = self.get_position(symbol)
+    def update_positions_prices(self, prices: Dict[str, float]) -> int:
+        """여러 심볼의 최신 가격 일괄 반영
+
+        캐시된 포지션은 메모리에서 갱신하고, 나머지는 IN 쿼리 1회 + bulk UPDATE 1회 + 커밋 1회
+        """
+        prices = {symbol.upper(): price for symbol, price in prices.items() if price}
+        missing = mark_prices(prices)
+        if not missing:
+            return 0
+        rows = []
+        for position in self.get_positions(missing).values():
+            latest_price = prices[position.symbol]
+            unrealized_pnl = position.unrealized_pnl
+            if position.side and position.qty > 0:
+                unrealized_pnl = realized_pnl(position.side, position.entry_price, latest_price, position.qty)
+            _marks.remember(position, latest_price, unrealized_pnl)
+            rows.append({"id": position.id, "latest_price": latest_price, "unrealized_pnl": unrealized_pnl})
+        if rows:
+            self.db.bulk_update_mappings(Position, rows)
+            self.db.commit()
+        return len(rows)
+
+    def close_position(self, symbol: str, qty: float = None,
+                       position: Optional[Position] = None) -> Optional[Position]:
+        """포지션 청산 (부분 또는 전체, flush만 수행, 커밋은 호출자 담당)"""
+        if position is None:
+            position = self.get_position(symbol)
         if not position or position.qty <= 0:
             return None
         
@@ -86,9 +412,8 @@ class PositionService:
             # 부분 청산
             position.qty -= qty
         
-        position.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(position)
+        self.db.flush()
+        self.track(position)
         return position
 
     def deactivate_position(self, symbol: str) -> bool:
@@ -98,8 +423,9 @@ class PositionService:
             return False
         
         position.is_active = False
-        position.updated_at = datetime.utcnow()
         self.db.commit()
+        _marks.forget(position.symbol)
+        _iso_cache.pop(position.id, None)
         return True
 
     def get_all_positions(self) -> list[Position]:
@@ -110,22 +436,27 @@ class PositionService:
         ).all()
 
     def to_dict(self, position: Position) -> Dict[str, Any]:
-        """포지션을 딕셔너리로 변환"""
+        """포지션(ORM 객체 또는 get_position_row 의 Row)을 딕셔너리로 변환"""
         if not position:
-            return {
-                "side": None,
-                "qty": 0.0,
-                "entry_price": None,
-                "latest_price": None,
-                "unrealized_pnl": 0.0
-            }
+            return dict(_EMPTY_POSITION)
+        
+        # 아직 저장되지 않은 캐시 시세가 있으면 우선 사용 (이미 반올림됨)
+        mark = _marks.get(position.symbol)
+        if mark is not None and mark[0] == position.id:
+            _, latest_price, unrealized_pnl = mark
+        else:
+            latest_price = round(position.latest_price, 2) if position.latest_price else None
+            unrealized_pnl = round(position.unrealized_pnl, 2)
         
+        created_at, updated_at = _iso_times(position)
+        qty = position.qty
+        is_open = qty > 0
         return {
-            "side": position.side if position.qty > 0 else None,
-            "qty": round(position.qty, 6),
-            "entry_price": round(position.entry_price, 2) if position.qty > 0 else None,
-            "latest_price": round(position.latest_price, 2) if position.latest_price else None,
-            "unrealized_pnl": round(position.unrealized_pnl, 2),
-            "created_at": position.created_at.isoformat() if position.created_at else None,
-            "updated_at": position.updated_at.isoformat() if position.updated_at else None
+            "side": position.side if is_open else None,
+            "qty": round(qty, 6),
+            "entry_price": round(position.entry_price, 2) if is_open else None,
+            "latest_price": latest_price or None,
+            "unrealized_pnl": unrealized_pnl,
+            "created_at": created_at,
+            "updated_at": updated_at
         }
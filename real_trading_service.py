@@ -1,8 +1,11 @@
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Set, Tuple
 from sqlalchemy.orm import Session
 from exchange_factory import ExchangeFactory
+from exchange_interface import ExchangeInterface
 from trading_config import TradingManager, TradingConfig, TradingMode
-from position_service import PositionService
+from position_service import PositionService, realized_pnl
+from models import Position
+from database import transaction
 from trade_service import save_trade
 import asyncio
 from datetime import datetime
@@ -12,6 +15,52 @@ class RealTradingService:
     
     def __init__(self, trading_manager: TradingManager):
         self.trading_manager = trading_manager
+        # {exchange_type: (설정 지문, 클라이언트)} - 설정이 바뀌면 지문이 달라져 재생성
+        self._clients: Dict[str, Tuple[tuple, ExchangeInterface]] = {}
+        # 교체된 클라이언트의 세션 종료 태스크 (참조를 유지해 GC/예외 유실 방지)
+        self._closing: Set[asyncio.Task] = set()
+    
+    def _get_client(self, exchange_type: str) -> Optional[ExchangeInterface]:
+        """설정된 거래소 클라이언트 반환 (api_key/testnet 별로 재사용)"""
+        exchange_config = self.trading_manager.config.exchanges.get(exchange_type)
+        if not exchange_config:
+            return None
+        
+        fingerprint = (
+            hash((exchange_config.api_key, exchange_config.api_secret)),
+            exchange_config.testnet
+        )
+        cached = self._clients.get(exchange_type)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        
+        client = ExchangeFactory.create_exchange(
+            exchange_type,
+            exchange_config.api_key,
+            exchange_config.api_secret,
+            exchange_config.testnet
+        )
+        self._clients[exchange_type] = (fingerprint, client)
+        if cached is not None:
+            # 이전 설정의 세션 정리
+            task = asyncio.get_running_loop().create_task(cached[1].close())
+            self._closing.add(task)
+            task.add_done_callback(self._on_client_closed)
+        return client
+    
+    def _on_client_closed(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error closing exchange client session: {task.exception()}")
+    
+    async def close(self):
+        """캐시된 거래소 클라이언트 세션 종료"""
+        clients = [client for _, client in self._clients.values()]
+        self._clients.clear()
+        for client in clients:
+            await client.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
     
     async def place_real_order(self, db: Session, exchange_type: str, symbol: str, 
                              side: str, quantity: float, price: float = None, 
@@ -35,17 +84,10 @@ class RealTradingService:
         
         try:
             # 거래소 인스턴스 가져오기
-            exchange_config = self.trading_manager.config.exchanges.get(exchange_type)
-            if not exchange_config:
+            exchange = self._get_client(exchange_type)
+            if exchange is None:
                 return {"status": "error", "message": f"Exchange {exchange_type} not configured"}
             
-            exchange = ExchangeFactory.get_exchange(
-                exchange_type, 
-                exchange_config.api_key, 
-                exchange_config.api_secret, 
-                exchange_config.testnet
-            )
-            
             # 실제 주문 실행
             if self.trading_manager.is_live_trading():
                 # 라이브 거래
@@ -64,16 +106,15 @@ class RealTradingService:
                 filled_price = float(order_result.get("price", price or 0))
                 filled_quantity = float(order_result.get("origQty", quantity))
                 
-                # 포지션 업데이트
-                position_service = PositionService(db)
-                pnl = self._update_position_on_real_trade(
-                    position_service, symbol, side, filled_price, filled_quantity
-                )
-                
-                # 거래 기록 저장
-                trade = save_trade(
-                    db, symbol, side, filled_price, filled_quantity, pnl=pnl
-                )
+                # 포지션 업데이트 + 거래 기록 저장 (단일 트랜잭션)
+                with transaction(db):
+                    position_service = PositionService(db)
+                    pnl = self._update_position_on_real_trade(
+                        position_service, symbol, side, filled_price, filled_quantity
+                    )
+                    trade = save_trade(
+                        db, symbol, side, filled_price, filled_quantity, pnl=pnl
+                    )
                 
                 # 일일 통계 업데이트
                 self.trading_manager.record_trade(exchange_type, pnl)
@@ -103,64 +144,59 @@ class RealTradingService:
     def _update_position_on_real_trade(self, position_service: PositionService, 
                                      symbol: str, side: str, price: float, 
                                      quantity: float) -> float:
-        """실제 거래로 인한 포지션 업데이트"""
-        position = position_service.get_position(symbol)
-        realized_pnl = 0.0
+        """실제 거래로 인한 포지션 업데이트 (조회 1회, 메모리 상에서 계산 후 flush 1회)"""
+        symbol = symbol.upper()
+        position = position_service.get_position_for_update(symbol)
         
-        if not position or position.qty == 0 or position.side is None:
+        if position is None:
             # 새 포지션 생성
-            position_service.create_or_update_position(symbol, side, quantity, price, price)
+            position = Position(
+                symbol=symbol, side=side, qty=quantity, entry_price=price,
+                latest_price=price, unrealized_pnl=0.0
+            )
+            position_service.db.add(position)
+            position_service.db.flush()
+            position_service.track(position)
             return 0.0
         
-        if side == position.side:
-            # 포지션 증가
-            new_qty = position.qty + quantity
-            new_entry_price = (position.entry_price * position.qty + price * quantity) / new_qty
-            position_service.create_or_update_position(symbol, side, new_qty, new_entry_price, price)
-            return 0.0
+        pnl = 0.0
+        if position.qty == 0 or position.side is None:
+            # 빈 포지션에 새로 진입
+            new_side, new_qty, new_entry = side, quantity, price
+        elif side == position.side:
+            # 포지션 증가 (평단가 재계산)
+            new_side, new_qty = side, position.qty + quantity
+            new_entry = (position.entry_price * position.qty + price * quantity) / new_qty
         else:
-            # 포지션 감소 또는 반전
-            if quantity < position.qty:
+            # 포지션 감소 또는 반전: 기존 수량까지만 실현손익 발생
+            pnl = realized_pnl(position.side, position.entry_price, price, min(quantity, position.qty))
+            remaining = position.qty - quantity
+            if remaining > 0:
                 # 부분 청산
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * quantity
-                else:
-                    realized_pnl = (position.entry_price - price) * quantity
-                new_qty = position.qty - quantity
-                position_service.create_or_update_position(symbol, position.side, new_qty, position.entry_price, price)
-            elif quantity == position.qty:
+                new_side, new_qty, new_entry = position.side, remaining, position.entry_price
+            elif remaining == 0:
                 # 전체 청산
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * quantity
-                else:
-                    realized_pnl = (position.entry_price - price) * quantity
-                position_service.close_position(symbol, quantity)
+                new_side, new_qty, new_entry = None, 0.0, 0.0
             else:
                 # 포지션 반전
-                close_qty = position.qty
-                if position.side == 'BUY':
-                    realized_pnl = (price - position.entry_price) * close_qty
-                else:
-                    realized_pnl = (position.entry_price - price) * close_qty
-                remaining = quantity - close_qty
-                position_service.create_or_update_position(symbol, side, remaining, price, price)
+                new_side, new_qty, new_entry = side, -remaining, price
         
-        return realized_pnl
+        position.side = new_side
+        position.qty = new_qty
+        position.entry_price = new_entry
+        position.latest_price = price
+        position.unrealized_pnl = realized_pnl(new_side, new_entry, price, new_qty) if new_side else 0.0
+        position_service.db.flush()
+        position_service.track(position)
+        return pnl
     
     async def cancel_real_order(self, exchange_type: str, symbol: str, order_id: str) -> Dict[str, Any]:
         """실제 주문 취소"""
         try:
-            exchange_config = self.trading_manager.config.exchanges.get(exchange_type)
-            if not exchange_config:
+            exchange = self._get_client(exchange_type)
+            if exchange is None:
                 return {"status": "error", "message": f"Exchange {exchange_type} not configured"}
             
-            exchange = ExchangeFactory.get_exchange(
-                exchange_type,
-                exchange_config.api_key,
-                exchange_config.api_secret,
-                exchange_config.testnet
-            )
-            
             result = await exchange.cancel_order(symbol, order_id)
             return {
                 "status": "ok",
@@ -176,17 +212,10 @@ class RealTradingService:
     async def get_real_positions(self, exchange_type: str) -> List[Dict[str, Any]]:
         """실제 포지션 조회"""
         try:
-            exchange_config = self.trading_manager.config.exchanges.get(exchange_type)
-            if not exchange_config:
+            exchange = self._get_client(exchange_type)
+            if exchange is None:
                 return []
             
-            exchange = ExchangeFactory.get_exchange(
-                exchange_type,
-                exchange_config.api_key,
-                exchange_config.api_secret,
-                exchange_config.testnet
-            )
-            
             positions = await exchange.get_positions()
             return positions
         except Exception as e:
@@ -195,17 +224,10 @@ class RealTradingService:
     async def get_real_account_info(self, exchange_type: str) -> Dict[str, Any]:
         """실제 계좌 정보 조회"""
         try:
-            exchange_config = self.trading_manager.config.exchanges.get(exchange_type)
-            if not exchange_config:
+            exchange = self._get_client(exchange_type)
+            if exchange is None:
                 return {}
             
-            exchange = ExchangeFactory.get_exchange(
-                exchange_type,
-                exchange_config.api_key,
-                exchange_config.api_secret,
-                exchange_config.testnet
-            )
-            
             account_info = await exchange.get_account_info()
             return account_info
         except Exception as e:
@@ -1,22 +1,51 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from models import Trade
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+# 마감된 날짜별 집계 메모 (오늘 이전 날짜만 저장)
+_daily_cache: Dict[str, dict] = {}
+# 날짜별 무효화 횟수 - 조회 도중 무효화된 날짜의 결과는 메모하지 않음
+_daily_epoch: Dict[str, int] = {}
+
+def _today() -> date:
+    # 거래 timestamp 는 UTC 기준
+    return datetime.now(timezone.utc).date()
+
+def invalidate_daily_pnl(days: Optional[Iterable[date]] = None):
+    """해당 날짜들(기본: 오늘)의 집계 메모 제거 - 커밋된 거래의 timestamp 날짜로 호출"""
+    for day in (days if days is not None else [_today()]):
+        key = day.isoformat()
+        _daily_epoch[key] = _daily_epoch.get(key, 0) + 1
+        _daily_cache.pop(key, None)
 
 def get_daily_pnl(db: Session, date_str: str):
-    start = datetime.strptime(date_str + " 00:00:00", "%Y-%m-%d %H:%M:%S")
-    end   = datetime.strptime(date_str + " 23:59:59", "%Y-%m-%d %H:%M:%S")
+    day = date.fromisoformat(date_str)
+    key = day.isoformat()
+    cached = _daily_cache.get(key)
+    if cached is not None:
+        return {**cached, "date": date_str}
+    epoch = _daily_epoch.get(key, 0)
+
+    # 반열린 구간 [당일 00:00, 다음날 00:00) — ix_trade_timestamp 범위 스캔
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
 
-    result = db.query(
-        func.sum(Trade.pnl).label("daily_pnl"),
-        func.count(Trade.id).label("num_trades")
-    ).filter(
-        Trade.timestamp >= start,
-        Trade.timestamp <= end
-    ).first()
+    daily_pnl, num_trades = db.execute(
+        select(func.sum(Trade.pnl), func.count(Trade.id)).where(
+            Trade.timestamp >= start,
+            Trade.timestamp < end
+        )
+    ).one()
 
-    return {
+    result = {
         "date": date_str,
-        "daily_pnl": float(result.daily_pnl or 0.0),
-        "num_trades": result.num_trades or 0
+        "daily_pnl": float(daily_pnl or 0.0),
+        "num_trades": num_trades or 0
     }
+    # 오늘/미래는 거래가 더 쌓일 수 있으므로 메모하지 않음.
+    # 조회하는 사이에 이 날짜의 거래가 커밋됐다면(epoch 변경) 결과가 이미 낡았을 수 있어 저장하지 않음
+    if day < _today() and _daily_epoch.get(key, 0) == epoch:
+        _daily_cache[key] = result
+    return dict(result)
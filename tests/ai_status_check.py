@@ -1,8 +1,17 @@
+import asyncio
 import json
 import time
 from urllib import request, parse
 
 BASE = "http://localhost:8001"
+WS_URL = "ws://localhost:8001/ws/ai-trading"
+TIMEOUT_SECONDS = 15
+POLL_INTERVAL = 0.2
+
+try:
+    import websockets  # type: ignore
+except Exception:
+    websockets = None
 
 
 def http_post(path: str):
@@ -18,6 +27,52 @@ def http_get(path: str):
         return json.loads(resp.read().decode("utf-8"))
 
 
+def is_ready(snap) -> bool:
+    """is_running 이고 전략 항목에 last_analysis 가 있으면 준비 완료"""
+    if not snap or not snap.get("is_running") or not isinstance(snap.get("strategies"), dict):
+        return False
+    if len(snap["strategies"]) == 0:
+        return False
+    any_id, s = next(iter(snap["strategies"].items()))
+    return "last_analysis" in s
+
+
+async def wait_via_ws(deadline: float):
+    """/ws/ai-trading 의 ai_status 푸시를 기다림 (상태가 바뀌는 즉시 수신)"""
+    snap = None
+    async with websockets.connect(WS_URL, ping_interval=None) as ws:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, snap
+            try:
+                msg = await asyncio.wait_for(ws.recv(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False, snap
+            data = json.loads(msg)
+            if data.get("type") != "ai_status":
+                continue
+            snap = data["data"]["status"]
+            print("status is_running=", snap.get("is_running"), "active_strategies=", snap.get("active_strategies"))
+            if is_ready(snap):
+                return True, snap
+
+
+def wait_via_poll(deadline: float):
+    """WebSocket 을 쓸 수 없을 때 /api/ai/status 를 짧은 간격으로 폴링"""
+    snap = None
+    while time.monotonic() < deadline:
+        try:
+            snap = http_get("/api/ai/status")
+            print("status is_running=", snap.get("is_running"), "active_strategies=", snap.get("active_strategies"))
+            if is_ready(snap):
+                return True, snap
+        except Exception as e:
+            print("status error:", e)
+        time.sleep(POLL_INTERVAL)
+    return False, snap
+
+
 def main():
     print("Starting AI engine...")
     try:
@@ -26,24 +81,17 @@ def main():
     except Exception as e:
         print("start error:", e)
 
-    print("Polling status for ~15s...")
-    start = time.time()
-    ok = False
-    snap = None
-    while time.time() - start < 15:
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    ok, snap = False, None
+    if websockets is not None:
+        print(f"Waiting for ai_status on {WS_URL} (up to {TIMEOUT_SECONDS}s)...")
         try:
-            snap = http_get("/api/ai/status")
-            print("status is_running=", snap.get("is_running"), "active_strategies=", snap.get("active_strategies"))
-            if snap.get("is_running") and isinstance(snap.get("strategies"), dict):
-                # check one strategy entry shape if present
-                if len(snap["strategies"]) > 0:
-                    any_id, s = next(iter(snap["strategies"].items()))
-                    if "last_analysis" in s:
-                        ok = True
-                        break
+            ok, snap = asyncio.run(wait_via_ws(deadline))
         except Exception as e:
-            print("status error:", e)
-        time.sleep(2)
+            print("ws error, falling back to polling:", e)
+    if not ok and time.monotonic() < deadline:
+        print(f"Polling status every {POLL_INTERVAL}s...")
+        ok, snap = wait_via_poll(deadline)
 
     print("Result:", {"ok": ok})
     if not ok:
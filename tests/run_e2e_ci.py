@@ -1,32 +1,42 @@
 import subprocess
 import sys
 import time
-import urllib.request
+import http.client
 import json
 import os
 
-BASE = "http://127.0.0.1:8001"
+HOST = "127.0.0.1"
+PORT = 8001
 
 
 def wait_for_health(timeout=30):
-    start = time.time()
-    while time.time() - start < timeout:
-        try:
-            with urllib.request.urlopen(f"{BASE}/healthz", timeout=5) as resp:
+    # one connection reused across attempts; backoff 50ms -> 500ms instead of a fixed 1s sleep
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=5)
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    try:
+        while time.monotonic() < deadline:
+            try:
+                conn.request("GET", "/healthz")
+                resp = conn.getresponse()
                 data = json.loads(resp.read().decode("utf-8"))
                 if data.get("status") == "ok":
                     return True
-        except Exception:
-            pass
-        time.sleep(1)
-    return False
+            except Exception:
+                # server not listening yet (or dropped the socket): reconnect on next attempt
+                conn.close()
+            time.sleep(delay)
+            delay = min(delay * 1.7, 0.5)
+        return False
+    finally:
+        conn.close()
 
 
 def main():
     env = os.environ.copy()
     # Start server via uvicorn in a subprocess
     print("[e2e] starting server...")
-    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8001", "--log-level", "warning"], env=env)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8001", "--ws-per-message-deflate", "false", "--log-level", "warning"], env=env)
     try:
         # Wait for health
         if not wait_for_health(timeout=45):
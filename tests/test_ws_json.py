@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ws_json import ws_text  # noqa: E402
+
+
+class _Price(float):
+    """float subclass (orjson rejects these without a default)"""
+
+
+def _ai_status(indicators):
+    return {
+        "type": "ai_status",
+        "data": {
+            "status": {
+                "is_running": True,
+                "strategies": {
+                    1: {"last_analysis": {"signal": "BUY", "technical_indicators": indicators}}
+                },
+            },
+            "dashboard": {},
+            "timestamp": 1700000000000,
+        },
+    }
+
+
+def _indicators(data):
+    return data["data"]["status"]["strategies"]["1"]["last_analysis"]["technical_indicators"]
+
+
+def test_ai_status_with_float_subclass_round_trips():
+    data = json.loads(ws_text(_ai_status({"rsi": _Price(55.5)})))
+    assert _indicators(data) == {"rsi": 55.5}
+
+
+def test_ai_status_with_numpy_values_round_trips():
+    np = pytest.importorskip("numpy")
+    indicators = {
+        "bb_position": np.std(np.array([1.0, 2.0, 3.0])) / 2,  # np.float64, as in the strategies
+        "rsi": np.float32(55.5),
+        "volume": np.int64(10),
+        "closes": np.array([1.5, 2.5]),
+    }
+    data = json.loads(ws_text(_ai_status(indicators)))
+    assert _indicators(data) == {
+        "bb_position": pytest.approx(float(np.std([1.0, 2.0, 3.0]) / 2)),
+        "rsi": 55.5,
+        "volume": 10,
+        "closes": [1.5, 2.5],
+    }
+
+
+def test_unsupported_type_still_raises():
+    with pytest.raises(TypeError):
+        ws_text({"x": object()})
@@ -1,15 +1,45 @@
+from typing import Dict, List
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 from models import Trade
+from report_service import invalidate_daily_pnl
 
-def save_trade(db: Session, symbol, side, price, qty, pnl=0.0):
-    trade = Trade(
-        symbol=symbol,
-        side=side,
-        price=price,
-        qty=qty,
-        pnl=pnl
+def save_trades(db: Session, rows: List[Dict]) -> List[Trade]:
+    """거래 여러 건을 한 번의 INSERT ... RETURNING으로 저장 (rows와 같은 순서의 Trade 반환)
+
+    커밋은 호출자 담당 - 포지션 갱신과 같은 트랜잭션으로 묶을 수 있도록 함
+    현재 체결 경로는 모두 주문 1건 = 체결 1건이라 save_trade를 통해 한 행씩만 들어옴
+    (체결마다 포지션 갱신과 원자적으로 커밋해야 하므로 틱 단위 버퍼링은 하지 않음)
+    """
+    if not rows:
+        return []
+    trades = db.scalars(
+        insert(Trade).returning(Trade, sort_by_parameter_order=True), rows
+    ).all()
+    # 일일 집계 메모는 이 트랜잭션이 커밋된 뒤, 저장된 거래의 날짜 기준으로 무효화
+    db.info.setdefault("trade_days", set()).update(
+        trade.timestamp.date() for trade in trades if trade.timestamp is not None
     )
-    db.add(trade)
-    db.commit()
-    db.refresh(trade)
-    return trade
+    if not event.contains(db, "after_commit", _on_trades_committed):
+        # 세션당 한 번만 등록 (AI 엔진처럼 오래 사는 세션에 리스너가 쌓이지 않게)
+        event.listen(db, "after_commit", _on_trades_committed)
+        event.listen(db, "after_rollback", _on_trades_rolled_back)
+    return trades
+
+def _on_trades_committed(session):
+    days = session.info.pop("trade_days", None)
+    if days:
+        invalidate_daily_pnl(days)
+
+def _on_trades_rolled_back(session):
+    # 롤백된 거래는 집계에 반영되지 않으므로 대기 중인 무효화도 버림
+    session.info.pop("trade_days", None)
+
+def save_trade(db: Session, symbol, side, price, qty, pnl=0.0):
+    return save_trades(db, [{
+        "symbol": symbol,
+        "side": side,
+        "price": price,
+        "qty": qty,
+        "pnl": pnl
+    }])[0]
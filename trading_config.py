@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from enum import Enum
+import numpy as np
 
 class TradingMode(Enum):
     SIMULATION = "simulation"
@@ -39,74 +40,121 @@ class TradingManager:
     def __init__(self, config: TradingConfig):
         self.config = config
         self.active_orders: Dict[str, List[Dict]] = {}  # {exchange: [orders]}
-        self.daily_pnl: Dict[str, float] = {}  # {exchange: pnl}
-        self.daily_trades: Dict[str, int] = {}  # {exchange: count}
+        # 일일 통계: 거래소별 인덱스 + 평면 배열 (거래소가 추가되면 배열 확장)
+        self._exchange_index: Dict[str, int] = {}
+        self._pnl = np.zeros(0, dtype=np.float64)
+        self._trades = np.zeros(0, dtype=np.int64)
+        # 거래소별 한도: (max_position_size, daily_loss_limit, max_daily_trades, enabled)
+        self._limits: Dict[str, Tuple[float, float, int, bool]] = {}
+        # get_daily_stats 응답용 뷰 (설정된 거래소만, 배열과 함께 제자리 갱신)
+        self._stats_view: Dict[str, Dict[str, float]] = {}
+        self._refresh_limits()
+        self._refresh_mode()
+    
+    def _refresh_limits(self):
+        """설정에서 거래소별 한도 튜플과 통계 뷰 재구성"""
+        max_daily_trades = self.config.max_daily_trades
+        self._limits = {
+            exchange_type: (
+                exchange_config.max_position_size,
+                exchange_config.daily_loss_limit,
+                max_daily_trades,
+                exchange_config.enabled
+            )
+            for exchange_type, exchange_config in self.config.exchanges.items()
+        }
+        for exchange_type in self._limits:
+            self._slot(exchange_type)
+        # 응답용 뷰: 설정 변경 시에만 배열 값으로 재구성, 이후 record_trade/reset 이 제자리 갱신
+        self._stats_view = {
+            exchange_type: {
+                "trades": int(self._trades[self._exchange_index[exchange_type]]),
+                "pnl": float(self._pnl[self._exchange_index[exchange_type]])
+            }
+            for exchange_type in self._limits
+        }
+    
+    def _refresh_mode(self):
+        mode = self.config.mode
+        self._trading_enabled = mode in (TradingMode.PAPER_TRADING, TradingMode.LIVE_TRADING)
+        self._live_trading = mode == TradingMode.LIVE_TRADING
+    
+    def set_exchange_config(self, exchange_config: ExchangeConfig):
+        """거래소 설정 등록/변경"""
+        self.config.exchanges[exchange_config.exchange_type] = exchange_config
+        self._refresh_limits()
+    
+    def set_mode(self, mode: TradingMode):
+        """거래 모드 변경"""
+        self.config.mode = mode
+        self._refresh_mode()
+    
+    def _slot(self, exchange_type: str) -> int:
+        """거래소의 통계 배열 인덱스 (없으면 추가)"""
+        i = self._exchange_index.get(exchange_type)
+        if i is None:
+            i = self._exchange_index[exchange_type] = len(self._exchange_index)
+            self._pnl = np.append(self._pnl, 0.0)
+            self._trades = np.append(self._trades, np.int64(0))
+        return i
+    
+    @property
+    def daily_pnl(self) -> Dict[str, float]:
+        """{exchange: pnl}"""
+        return {ex: float(self._pnl[i]) for ex, i in self._exchange_index.items()}
+    
+    @property
+    def daily_trades(self) -> Dict[str, int]:
+        """{exchange: count}"""
+        return {ex: int(self._trades[i]) for ex, i in self._exchange_index.items()}
     
     def is_trading_enabled(self) -> bool:
         """실제 거래가 활성화되어 있는지 확인"""
-        return self.config.mode in [TradingMode.PAPER_TRADING, TradingMode.LIVE_TRADING]
+        return self._trading_enabled
     
     def is_live_trading(self) -> bool:
         """라이브 거래인지 확인"""
-        return self.config.mode == TradingMode.LIVE_TRADING
+        return self._live_trading
     
     def can_place_order(self, exchange_type: str) -> bool:
-        """주문 가능 여부 확인"""
-        if not self.is_trading_enabled():
-            return False
-        
-        exchange_config = self.config.exchanges.get(exchange_type)
-        if not exchange_config or not exchange_config.enabled:
+        """주문 가능 여부 확인 (활성화 & 일일 거래 한도)"""
+        limits = self._limits.get(exchange_type)
+        if limits is None:
             return False
-        
-        # 일일 거래 한도 확인
-        daily_trades = self.daily_trades.get(exchange_type, 0)
-        if daily_trades >= self.config.max_daily_trades:
-            return False
-        
-        return True
+        _, _, max_daily_trades, enabled = limits
+        trades = self._trades[self._exchange_index[exchange_type]]
+        return self._trading_enabled & enabled & bool(trades < max_daily_trades)
     
     def check_risk_limits(self, exchange_type: str, order_value: float) -> bool:
-        """리스크 한도 확인"""
+        """리스크 한도 확인 (포지션 크기 & 일일 손실 한도)"""
         if not self.config.risk_management:
             return True
         
-        exchange_config = self.config.exchanges.get(exchange_type)
-        if not exchange_config:
-            return False
-        
-        # 포지션 크기 한도
-        if order_value > exchange_config.max_position_size:
+        limits = self._limits.get(exchange_type)
+        if limits is None:
             return False
-        
-        # 일일 손실 한도
-        daily_pnl = self.daily_pnl.get(exchange_type, 0)
-        if daily_pnl < -exchange_config.daily_loss_limit:
-            return False
-        
-        return True
+        max_position_size, daily_loss_limit, _, _ = limits
+        pnl = self._pnl[self._exchange_index[exchange_type]]
+        return (order_value <= max_position_size) & bool(pnl >= -daily_loss_limit)
     
     def record_trade(self, exchange_type: str, pnl: float):
         """거래 기록"""
-        if exchange_type not in self.daily_trades:
-            self.daily_trades[exchange_type] = 0
-        if exchange_type not in self.daily_pnl:
-            self.daily_pnl[exchange_type] = 0
-        
-        self.daily_trades[exchange_type] += 1
-        self.daily_pnl[exchange_type] += pnl
+        i = self._slot(exchange_type)
+        self._trades[i] += 1
+        self._pnl[i] += pnl
+        view = self._stats_view.get(exchange_type)
+        if view is not None:
+            view["trades"] = int(self._trades[i])
+            view["pnl"] = float(self._pnl[i])
     
     def reset_daily_stats(self):
         """일일 통계 초기화"""
-        self.daily_trades.clear()
-        self.daily_pnl.clear()
+        self._trades[:] = 0
+        self._pnl[:] = 0.0
+        for view in self._stats_view.values():
+            view["trades"] = 0
+            view["pnl"] = 0.0
     
     def get_daily_stats(self) -> Dict[str, Dict]:
-        """일일 통계 조회"""
-        stats = {}
-        for exchange_type in self.config.exchanges:
-            stats[exchange_type] = {
-                "trades": self.daily_trades.get(exchange_type, 0),
-                "pnl": self.daily_pnl.get(exchange_type, 0)
-            }
-        return stats
+        """일일 통계 조회 (미리 갱신된 뷰의 거래소별 복사본 - 호출자가 수정해도 뷰에 영향 없음)"""
+        return {exchange_type: dict(stats) for exchange_type, stats in self._stats_view.items()}
@@ -0,0 +1,22 @@
+import orjson
+
+# NumPy arrays/scalars are serialized natively; anything else orjson rejects
+# (float/int subclasses, objects exposing tolist()/item()) falls back to _default.
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def ws_text(obj) -> str:
+    """orjson-encode a WebSocket message as text (the frontend JSON.parses event.data)."""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()